@@ -1,17 +1,25 @@
+import os
 from flask import Flask
 from utilities.db import db
 from blueprints.main import main_bp
+from blueprints.api import api_bp
+from blueprints.health import health_bp
 
 app = Flask(__name__)
-app.config['DEBUG'] = True
+# Отладчик включается только явно (FLASK_DEBUG=1, как в docker-compose для разработки)
+app.config['DEBUG'] = os.getenv("FLASK_DEBUG") == "1"
 
-app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql://postgres:postgres@db:5432/postgres"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/postgres")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db.init_app(app)
 
 # регистрируем blueprint
 app.register_blueprint(main_bp)
+app.register_blueprint(api_bp)
+app.register_blueprint(health_bp)
+# JSON API отдаёт кириллицу и символы формул как есть, без \uXXXX
+app.json.ensure_ascii = False
 
 # создаём таблицы
 with app.app_context():
@@ -0,0 +1,107 @@
+'''
+Нагрузочный замер слоя LLM (ансамбль, страница /test/neuro, пакетный фолбэк)
+на локальном сервере-заглушке `fake_llm_server.py` — без облачных API.
+
+Сервер запускается в этом же процессе; задержки и доля ошибок задаются так же,
+как у fake_llm_server.py. Печатаются перцентили времени на один вызов,
+пропускная способность и число запросов, дошедших до «провайдеров».
+
+Пример:
+    python bench_llm.py --target ensemble --calls 50 --concurrency 4 --latency lognormal:0.3,0.6
+    python bench_llm.py --target neuro --sentences 5 --calls 50 --giga-error-rate 0.5
+    python bench_llm.py --target batch --calls 20 --no-cache
+'''
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from fake_llm_server import start_server, client_env, add_profile_arguments, profiles_from_args
+
+SENTENCES = [
+    "Every man loves a woman",
+    "Some students are smart",
+    "No dog barks",
+    "All students who study pass",
+    "John gives Mary a book",
+    "Every teacher reads some books",
+]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер ансамбля LLM на локальном сервере-заглушке.")
+    parser.add_argument("--target", choices=["ensemble", "neuro", "batch"], default="ensemble",
+                        help="ensemble — LLMCall.ensemble; neuro — вызовы страницы /test/neuro; "
+                             "batch — ensemble_batch по всем предложениям сразу")
+    parser.add_argument("--calls", type=int, default=20, help="Число вызовов")
+    parser.add_argument("--concurrency", type=int, default=1, help="Одновременных вызовов")
+    parser.add_argument("--sentences", type=int, default=len(SENTENCES),
+                        help="Сколько разных предложений использовать (меньше — больше попаданий в кеш)")
+    parser.add_argument("--no-cache", action="store_true", help="Отключить кеш ответов")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = start_server(profiles=profiles_from_args(args), seed=args.seed,
+                          token_latency=args.token_latency, explanation=args.explanation)
+    # LLMCall читает настройки при импорте, поэтому окружение задаётся до него
+    os.environ.update(client_env(server))
+    os.environ["LLM_CACHE"] = "0" if args.no_cache else "1"
+    cache_dir = tempfile.mkdtemp(prefix="llm-bench-")
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join(cache_dir, "cache.sqlite3"))
+    os.environ.setdefault("LLM_RATE_STATE_PATH", os.path.join(cache_dir, "rate.sqlite3"))
+    from utilities import LLMCall
+
+    sentences = (SENTENCES * (args.sentences // len(SENTENCES) + 1))[:max(1, args.sentences)]
+
+    def run(i: int) -> float:
+        sentence = sentences[i % len(sentences)]
+        started = time.perf_counter()
+        if args.target == "ensemble":
+            LLMCall.ensemble(sentence)
+        elif args.target == "neuro":
+            answers = LLMCall.ensemble_candidates(sentence)
+            LLMCall.synthesize(sentence, answers)
+        else:
+            LLMCall.ensemble_batch(sentences)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        timings = list(pool.map(run, range(args.calls)))
+    wall = time.perf_counter() - started
+
+    with server.stats_lock:
+        stats = dict(server.stats)
+    server.shutdown()
+    report = {
+        "target": args.target,
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "wall_s": round(wall, 3),
+        "calls_per_s": round(args.calls / wall, 2),
+        "p50_s": round(percentile(timings, 0.50), 3),
+        "p95_s": round(percentile(timings, 0.95), 3),
+        "p99_s": round(percentile(timings, 0.99), 3),
+        "max_s": round(max(timings), 3),
+        "provider_requests": stats,
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+    else:
+        for key, value in report.items():
+            print(f"{key:>18}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+'''
+JSON API v1: конвертация, анализ, перевод и резолюция пакетами, без шаблонов.
+
+Каждый эндпоинт принимает массив элементов и возвращает `{"results": [...]}`
+в том же порядке. Ошибка запроса — `{"error": "..."}` с кодом 400.
+Долгие резолюцию и ансамбль LLM можно поставить в фоновую очередь (`/jobs`),
+а шаги больших трасс резолюции получать страницами (`/traces/<id>`).
+'''
+import os
+from typing import Any, List
+
+from flask import Blueprint, get_template_attribute, jsonify, request
+
+from blueprints.main import analyzer, converter, translator_en, translator_ru, get_fols_with_fallback, record_resolution, resolve_converted
+from utilities import Translation
+from utilities.LLMCall import ensemble_batch
+from utilities.JobQueue import HANDLERS, job_handler, submit, get_job, wait_job, job_to_dict, stats
+from utilities.Traces import TRACE_PAGE_SIZE, VIEWS, TraceRecorder, load_page, save_trace
+
+api_bp = Blueprint("api_v1", __name__, url_prefix="/api/v1")
+
+# Предел числа элементов в одном запросе
+MAX_BATCH = int(os.getenv("API_MAX_BATCH", "1000"))
+# Дольше этого HTTP-запрос статуса задания не ждёт
+MAX_JOB_WAIT = float(os.getenv("API_MAX_JOB_WAIT", "30"))
+TRANSLATORS = {
+    ("ru", "en"): translator_en,
+    ("en", "ru"): translator_ru,
+}
+
+
+class ApiError(Exception):
+    pass
+
+
+@api_bp.errorhandler(ApiError)
+def api_error(error):
+    return jsonify({"error": str(error)}), 400
+
+
+def get_list(payload: Any, field: str) -> List[Any]:
+    """Достаёт из тела запроса непустой массив `field` не длиннее MAX_BATCH."""
+    items = payload.get(field) if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ApiError(f"Ожидался непустой массив '{field}'")
+    if len(items) > MAX_BATCH:
+        raise ApiError(f"Слишком много элементов в '{field}': {len(items)} > {MAX_BATCH}")
+    return items
+
+
+def get_strings(payload: Any, field: str) -> List[str]:
+    items = get_list(payload, field)
+    if not all(isinstance(item, str) for item in items):
+        raise ApiError(f"Элементы '{field}' должны быть строками")
+    return items
+
+
+def pattern_name(pattern) -> Any:
+    return str(pattern) if pattern else None
+
+
+@api_bp.route("/convert", methods=["POST"])
+def convert():
+    """{"sentences": [...]} -> {"results": [{"pattern", "fol"}]}"""
+    sentences = get_strings(request.get_json(silent=True), "sentences")
+    results = [
+        {"pattern": pattern_name(pattern), "fol": fol}
+        for pattern, fol in converter.convert_many(sentences)
+    ]
+    return jsonify({"results": results})
+
+
+@api_bp.route("/analyze", methods=["POST"])
+def analyze():
+    """
+    {"sentences": [...], "arcs": false} -> {"results": [{"pattern", "fol", "tokens", "arcs"?}]},
+    где tokens — список [text, lemma, pos, dep, head] (head — индекс вершины в предложении),
+    arcs — слова и дуги дерева в формате displacy для отрисовки на клиенте.
+    """
+    payload = request.get_json(silent=True)
+    sentences = get_strings(payload, "sentences")
+    with_arcs = bool(payload.get("arcs", False))
+    results = []
+    for doc in converter.nlp.pipe(sentences):
+        pattern, fol = converter.convert_doc(doc)
+        item = {
+            "pattern": pattern_name(pattern),
+            "fol": fol,
+            "tokens": [[t.text, t.lemma_, t.pos_, t.dep_, t.head.i] for t in doc],
+        }
+        if with_arcs:
+            item["arcs"] = analyzer.visualizer.parse(doc)
+        results.append(item)
+    return jsonify({"results": results})
+
+
+@api_bp.route("/translate", methods=["POST"])
+def translate():
+    """
+    {"sentences": [...], "source": "ru", "target": "en"} -> {"results": [{"text", "backend"}]}
+    {"formulas": [...], "source": "en", "target": "ru"} -> {"results": [{"text"}]} — перевод термов формул.
+    """
+    payload = request.get_json(silent=True) or {}
+    source, target = payload.get("source", "ru"), payload.get("target", "en")
+    translator = TRANSLATORS.get((source, target))
+    if translator is None:
+        raise ApiError(f"Направление перевода не поддерживается: {source}-{target}")
+
+    if "formulas" in payload:
+        formulas = get_strings(payload, "formulas")
+        results = [{"text": Translation.translate_fol_terms(f, translator)} for f in formulas]
+    else:
+        results = []
+        for sentence in get_strings(payload, "sentences"):
+            text, timing = translator.translate_timed(sentence)
+            results.append({"text": text, "backend": timing["backend"]})
+    return jsonify({"results": results})
+
+
+def resolve_problems(payload: Any) -> List[dict]:
+    """
+    Резолюция для пакета задач:
+    {"problems": [{"premises": [...], "goal": "..."}], "llm_only": false, "steps": false,
+    "trace": false, "proof": false}.
+    С "trace": true шаги сохраняются, и их можно получать страницами по trace_id
+    (`/traces/<id>`) вместо всего списка сразу. "proof": true возвращает только
+    доказательство — шаги, из которых выведен пустой дизъюнкт; если ни steps,
+    ни trace не запрошены, полная трасса при этом даже не собирается.
+
+    Предложения всех задач конвертируются одним пакетом, поэтому обращения
+    к LLM для неразобранных предложений тоже идут вместе.
+    """
+    if not isinstance(payload, dict):
+        raise ApiError("Ожидался объект JSON")
+    problems = get_list(payload, "problems")
+    llm_only = bool(payload.get("llm_only", False))
+    with_steps = bool(payload.get("steps", False))
+    with_trace = bool(payload.get("trace", False))
+    with_proof = bool(payload.get("proof", False))
+    keep_trace = with_steps or with_trace
+
+    texts: List[str] = []
+    bounds = []
+    for problem in problems:
+        premises = problem.get("premises") if isinstance(problem, dict) else None
+        goal = problem.get("goal") if isinstance(problem, dict) else None
+        if not isinstance(premises, list) or not all(isinstance(p, str) for p in premises) or not isinstance(goal, str):
+            raise ApiError("Каждая задача — объект с массивом строк 'premises' и строкой 'goal'")
+        premises = [p for p in premises if p.strip()]
+        bounds.append((len(texts), len(premises)))
+        texts.extend(premises)
+        texts.append(goal)
+    if len(texts) > MAX_BATCH:
+        raise ApiError(f"Слишком много предложений: {len(texts)} > {MAX_BATCH}")
+
+    converted = get_fols_with_fallback(texts, converter, llm_only)
+    results = []
+    for start, count in bounds:
+        converted_premises = converted[start:start + count]
+        converted_goal = converted[start + count]
+        if with_trace and not with_steps:
+            # Шаги сразу пишутся в базу, список всей трассы не собирается
+            recorder = TraceRecorder(per_page=0)
+            result, proof = record_resolution(converted_premises, converted_goal, recorder)
+            steps = []
+        else:
+            result, steps, proof = resolve_converted(converted_premises, converted_goal, keep_trace)
+        item = {
+            "result": result,
+            "fol_premises": [fol for fol, _ in converted_premises],
+            "fol_goal": converted_goal[0],
+        }
+        if with_steps:
+            item["steps"] = steps
+        if with_trace:
+            item["trace_id"] = recorder.trace_id if not with_steps else (save_trace(result, steps, proof) if steps else None)
+        if with_proof:
+            item["proof"] = proof
+        results.append(item)
+    return results
+
+
+@api_bp.route("/resolve", methods=["POST"])
+def resolve():
+    """{"problems": [...], ...} -> {"results": [{"result", "fol_premises", "fol_goal", "steps"?, "trace_id"?, "proof"?}]}"""
+    return jsonify({"results": resolve_problems(request.get_json(silent=True))})
+
+
+@api_bp.route("/traces/<trace_id>", methods=["GET"])
+def trace_steps(trace_id):
+    """
+    Страница шагов сохранённой трассы резолюции.
+
+    ?page=1&per_page=100&view=all|proof|initial|resolve, либо info=Initial,Resolve
+    (типы шагов; вместе с view=proof — среди шагов доказательства).
+    -> {"id", "result", "steps", "page", "pages", "per_page", "total"}.
+    С html=1 вместо steps приходят rows — готовые строки таблицы страницы резолюции.
+    """
+    view = request.args.get("view", "all")
+    if view not in VIEWS:
+        raise ApiError(f"Неизвестный вид шагов: {view}")
+    info = request.args.get("info")
+    kinds, proof = VIEWS[view]
+    page = load_page(
+        trace_id,
+        request.args.get("page", 1, type=int),
+        request.args.get("per_page", TRACE_PAGE_SIZE, type=int),
+        info.split(",") if info else kinds,
+        proof,
+    )
+    if page is None:
+        return jsonify({"error": "Трасса не найдена"}), 404
+    if request.args.get("html") == "1":
+        step_row = get_template_attribute("_resolution_step.html", "step_row")
+        page["rows"] = [str(step_row(step)) for step in page.pop("steps")]
+    return jsonify(page)
+
+
+# ------------------------------
+# Фоновые задания
+# ------------------------------
+
+@job_handler("resolve")
+def resolve_job(payload):
+    return resolve_problems(payload)
+
+
+@job_handler("ensemble")
+def ensemble_job(payload):
+    # {"sentences": [...]} -> формулы от ансамбля LLM
+    return ensemble_batch(get_strings(payload, "sentences"))
+
+
+@api_bp.route("/jobs", methods=["POST"])
+def create_job():
+    """
+    {"kind": "resolve" | "ensemble", "payload": {...}} -> 202 {"id", "status"}.
+    Тело payload такое же, как у синхронного эндпоинта.
+    """
+    body = request.get_json(silent=True) or {}
+    kind = body.get("kind")
+    if kind not in HANDLERS:
+        raise ApiError(f"Неизвестный вид задания: {kind}")
+    if not isinstance(body.get("payload"), dict):
+        raise ApiError("Ожидался объект 'payload'")
+    job = submit(kind, body["payload"])
+    return jsonify(job_to_dict(job)), 202
+
+
+@api_bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    Статус задания; с параметром ?wait=<секунды> ответ приходит, как только
+    задание завершится (но не позже указанного времени).
+    """
+    wait = min(request.args.get("wait", 0, type=float), MAX_JOB_WAIT)
+    job = wait_job(job_id, wait) if wait > 0 else get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Задание не найдено"}), 404
+    return jsonify(job_to_dict(job))
+
+
+@api_bp.route("/jobs/stats", methods=["GET"])
+def job_stats():
+    return jsonify(stats())
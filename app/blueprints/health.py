@@ -0,0 +1,42 @@
+from flask import Blueprint, jsonify
+from sqlalchemy import text
+from utilities.db import db
+from utilities import Startup
+
+health_bp = Blueprint("health", __name__)
+
+
+@health_bp.route("/healthz")
+def healthz():
+    """Liveness: процесс жив и отвечает на запросы."""
+    return jsonify({"status": "ok"})
+
+
+@health_bp.route("/readyz")
+def readyz():
+    """
+    Readiness: модели загружены и база данных доступна.
+    Пока проверка не проходит, балансировщику отдаётся 503.
+    """
+    from blueprints.main import converter
+
+    # Модель загружается лениво: первая проверка готовности её и загрузит
+    try:
+        checks = {"model": converter.nlp is not None}
+    except Exception:
+        checks = {"model": False}
+    try:
+        db.session.execute(text("SELECT 1"))
+        checks["database"] = True
+    except Exception:
+        db.session.rollback()
+        checks["database"] = False
+
+    ready = all(checks.values())
+    return jsonify({"status": "ready" if ready else "not ready", "checks": checks}), 200 if ready else 503
+
+
+@health_bp.route("/healthz/startup")
+def startup():
+    """Время импорта тяжёлых модулей и прогрева (см. utilities.Startup)."""
+    return jsonify(Startup.TIMINGS)
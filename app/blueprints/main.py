@@ -1,21 +1,53 @@
-from flask import Blueprint, render_template, request
-from utilities.FolConvertion import FolConverterEn
+from flask import Blueprint, Response, get_template_attribute, jsonify, render_template, request, stream_with_context, url_for
+from utilities.FolConvertion import FolConverterEn, ERROR_MESSAGE
 from utilities.FolAnalyzer import FolAnalyzerEn
-from deep_translator import GoogleTranslator
-from utilities.LLMCall import call_yandex_neuro, call_gemma, call_giga, to_promt_1, ensemble
-from utilities.Resolution import run_resolution
+from utilities.LLMCall import ensemble_batch, ensemble_candidates, synthesize
+from utilities.Resolution import find_proof, iter_resolution, Formula, IDENTIFIER_TOKEN
+from utilities import Translation, Startup, Traces
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import html
+import json
+import os
 import re
-import time
 
-ERROR_MESSAGE = "[Ошибка] Не удалось определить тип предложения."
-translator_en=GoogleTranslator(source="ru", target="en")
-translator_ru=GoogleTranslator(source="en", target="ru")
+# Объекты лёгкие: модель spaCy, паттерны и бэкенды перевода загружаются
+# при первом обращении или заранее в warm_up
+translator_en=Translation.Translator(source="ru", target="en")
+translator_ru=Translation.Translator(source="en", target="ru")
 converter = FolConverterEn()
 analyzer = FolAnalyzerEn()
 # translator = Translator()
 
+# Тяжёлые зависимости, время импорта которых попадает в отчёт о запуске
+HEAVY_MODULES = ["spacy", "openai", "httpx", "gigachat", "deep_translator"]
+
+
+def warm_up(llm: bool = True, translation: bool = True) -> Dict[str, float]:
+    """
+    Загружает модели и зависимости заранее, чтобы первый запрос не ждал их.
+    Вызывается в главном процессе gunicorn до fork (см. gunicorn.conf.py)
+    и в воркерах очереди; dev-сервер грузит всё лениво.
+
+    Returns:
+        Dict[str, float]: Время каждого шага в миллисекундах (Startup.TIMINGS).
+    """
+    modules = [m for m in HEAVY_MODULES
+               if (llm or m not in ("openai", "httpx", "gigachat"))
+               and (translation or m != "deep_translator")]
+    Startup.import_timed(modules)
+    steps = [
+        ("spacy model", lambda: converter.nlp),
+        ("patterns", lambda: (converter.factory, analyzer.factory)),
+    ]
+    if translation:
+        steps.append(("translators", lambda: [t.backend for t in (translator_en, translator_ru)]))
+    return Startup.warm_up(steps)
+
 main_bp = Blueprint("main", __name__, template_folder="../templates")
 
+CONVERSION_FAILURE = "FAILURE: Невозможно запустить резолюцию из-за ошибок в конвертации одной или нескольких формул."
+
 @main_bp.route("/")
 def home():
     return render_template(
@@ -27,26 +59,47 @@ def index():
     fol_formula = None
     sentence = None
     pattern=None
+    sentences = None
     
     if request.method == "POST":
         sentence = request.form.get("sentence")
         if sentence:
-            fol_formula = converter.convert_to_fol(sentence)
-            pattern = converter.get_pattern(sentence)
+            # Один проход модели по всему тексту, паттерн — для каждого предложения
+            sentences = converter.convert_document(sentence)
+            if len(sentences) == 1:
+                fol_formula = sentences[0]["fol"]
+                pattern = sentences[0]["pattern"] or fol_formula
+                sentences = None
 
     return render_template(
         "base_converter.html", 
         sentence=sentence, 
         fol_formula=fol_formula, 
-        pattern=pattern
+        pattern=pattern,
+        sentences=sentences
     )
 
 @main_bp.route("/test/display", methods=["GET", "POST"])
 def display():
+    """
+    Анализ предложения с деревом зависимостей.
+
+    Параметр format (в форме или в строке запроса, вместе с sentence):
+    "svg" — только SVG дерева, "json" — формула и дуги дерева для отрисовки
+    на клиенте; без него — HTML-страница.
+    """
     result = None
+    output = request.values.get("format")
+    text = request.values.get("sentence")
+
+    if output in ("svg", "json"):
+        if not text:
+            return jsonify({"error": "Ожидался параметр 'sentence'"}), 400
+        if output == "svg":
+            return Response(analyzer.analyze(text, tree="svg")["tree_html"], mimetype="image/svg+xml")
+        return jsonify(analyzer.analyze(text, tree="arcs"))
 
     if request.method == "POST":
-        text = request.form.get("sentence")
         result = analyzer.analyze(text)
 
     return render_template(
@@ -57,25 +110,10 @@ def display():
 def translate_fol_terms(fol_formula: str, target_lang: str) -> str:
     """
     Переводит только термы (слова) в формуле FOL обратно на исходный язык,
-    сохраняя всю логическую структуру.
-    """
-    terms = set(re.findall(r"[A-Za-z]+", fol_formula))
-    vars = ["x", "w", "y", "z", "k", "r1", "r2", "r3"]
-    translation_map = {}
-    for term in terms:
-        if term in vars:
-            translation_map[term] = term
-            continue
-        translated = translator_ru.translate(term)
-        # translated = translator.translate(term, src="en", dest=target_lang).text
-        translated = translated.replace(" ", "_")
-        translation_map[term] = translated
-
-    translated_formula = fol_formula
-    for en_term, tr_term in translation_map.items():
-        translated_formula = re.sub(rf"\b{en_term}\b", tr_term, translated_formula)
-
-    return translated_formula
+    сохраняя всю логическую структуру. Переводы кешируются, а недостающие
+    запрашиваются одним вызовом переводчика.
+    """
+    return Translation.translate_fol_terms(fol_formula, translator_ru)
 
 @main_bp.route("/test/trans_page", methods=["GET", "POST"])
 def trans_page():
@@ -85,11 +123,12 @@ def trans_page():
     pattern = None
     detected_lang = None
     translated_sentence = None
+    translation_timing = None
 
     if request.method == "POST":
         sentence = request.form.get("sentence")
         if sentence:
-            translated_sentence = translator_en.translate(sentence)
+            translated_sentence, translation_timing = translator_en.translate_timed(sentence)
             # detection = translator.detect(sentence)
             # detected_lang = detection.lang  # например "ru", "en", "de"
             # if detected_lang != "en":
@@ -108,6 +147,7 @@ def trans_page():
         fol_formula=fol_formula,
         fol_formula_native=fol_formula_native,
         pattern=pattern,
+        translation_timing=translation_timing,
     )
 
 @main_bp.route('/test/neuro', methods=['GET', 'POST'])
@@ -120,11 +160,13 @@ def predicate_form():
     
     if request.method == 'POST':
         sentence = request.form.get('sentence')
-        yandex_result = call_yandex_neuro(sentence, to_promt_1)
-        giga_result = call_giga(sentence, to_promt_1)
-        gemma_result = call_gemma(sentence, to_promt_1)
-        time.sleep(1)
-        ensemble_result = ensemble(sentence)
+        # Кандидаты запрашиваются параллельно и сразу идут в синтез ансамбля
+        # (частоту запросов ограничивает RATE_LIMITERS в LLMCall)
+        answers = ensemble_candidates(sentence)
+        yandex_result = answers["yandex"]
+        giga_result = answers["giga"]
+        gemma_result = answers["gemma"]
+        ensemble_result = synthesize(sentence, answers)
     
     return render_template('neuro.html', 
                          sentence=sentence,
@@ -134,26 +176,171 @@ def predicate_form():
                          ensemble_result=ensemble_result
                          )
 
-def get_fol_with_fallback(text: str, converter, llm_only: bool = False) -> str:
-    if not text.strip():
-        return ""
-    
-    if llm_only:
-        try:
-            fol_from_neuro = ensemble(text)
-            return f"{fol_from_neuro.strip()}"
-        except Exception as e:
-            return f""
-        
-    fol_result = converter.convert_to_fol(text)
-    if fol_result == ERROR_MESSAGE:
+def get_fols_with_fallback(texts, converter, llm_only: bool = False) -> List[Tuple[str, Optional[Formula]]]:
+    """
+    Возвращает для каждого текста строку формулы и, если её построил конвертер, дерево Formula.
+    Тексты, которые конвертер не разобрал, отправляются в LLM одним пакетом
+    (параллельно), а не по одному. Ответы LLM возвращаются только строкой
+    (их разбирает решатель).
+    """
+    results: List[Tuple[str, Optional[Formula]]] = [("", None)] * len(texts)
+    fallback = []
+    for i, text in enumerate(texts):
+        if not text.strip():
+            continue
+        if llm_only:
+            fallback.append(i)
+            continue
+        fol_result, formula = converter.convert_to_formula(text)
+        if fol_result == ERROR_MESSAGE:
+            fallback.append(i)
+        else:
+            results[i] = (fol_result, formula)
+
+    if fallback:
+        answers = ensemble_batch([texts[i] for i in fallback])
+        for i, fol_from_neuro in zip(fallback, answers):
+            results[i] = (f"{fol_from_neuro.strip()}", None)
+    return results
+
+def get_fol_with_fallback(text: str, converter, llm_only: bool = False) -> Tuple[str, Optional[Formula]]:
+    return get_fols_with_fallback([text], converter, llm_only)[0]
+
+def resolve_converted(converted_premises, converted_goal, keep_trace: bool = True) -> Tuple[str, list, list]:
+    """
+    Запускает резолюцию по результатам get_fols_with_fallback.
+    Если какая-то формула не построена, резолюция не запускается.
+
+    Returns:
+        Tuple[str, list, list]: Итог, полная трасса (пустая без keep_trace)
+        и доказательство — шаги, из которых выведен пустой дизъюнкт.
+    """
+    fol_goal, goal_formula = converted_goal
+    has_error = any("[Ошибка]" in fol for fol, _ in converted_premises) or "[Ошибка]" in fol_goal
+    if has_error:
+        return CONVERSION_FAILURE, [], []
+
+    # Формулы от конвертера передаются деревьями, без повторного разбора строк
+    result, proof, steps = find_proof(
+        [formula or fol for fol, formula in converted_premises],
+        goal_formula or fol_goal,
+        keep_trace=keep_trace,
+    )
+    return result, steps, proof
+
+def resolution_events(converted_premises, converted_goal, keep_trace: bool = True):
+    """То же, что resolve_converted, но генератором событий iter_resolution."""
+    fol_goal, goal_formula = converted_goal
+    has_error = any("[Ошибка]" in fol for fol, _ in converted_premises) or "[Ошибка]" in fol_goal
+    if has_error:
+        yield {"type": "result", "result": CONVERSION_FAILURE}
+        return
+
+    yield from iter_resolution(
+        [formula or fol for fol, formula in converted_premises],
+        goal_formula or fol_goal,
+        keep_trace=keep_trace,
+    )
+
+def record_resolution(converted_premises, converted_goal, recorder: Traces.TraceRecorder) -> Tuple[str, list]:
+    """
+    Как resolve_converted, но шаги передаются в recorder (и пишутся в базу
+    пакетами), а не собираются списком. Возвращает итог и доказательство.
+    """
+    result, proof = "ERROR", []
+    try:
+        for event in resolution_events(converted_premises, converted_goal):
+            if event["type"] == "result":
+                result, proof = event["result"], event.get("proof", [])
+            else:
+                recorder.add(event["step"])
+        recorder.finish(result, proof)
+    finally:
+        recorder.close()
+    return result, proof
+
+def trace_url(page: Optional[dict]) -> Optional[str]:
+    """Адрес JSON API для подгрузки следующих страниц трассы (None — всё уже показано)."""
+    if not page or not page["id"]:
+        return None
+    return url_for("api_v1.trace_steps", trace_id=page["id"], view=page["view"],
+                   per_page=page["per_page"], html=1)
+
+def sse(event: str, data) -> str:
+    """Одно событие server-sent events с данными в JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@main_bp.route("/test/resol/stream")
+def resolution_stream():
+    """
+    Потоковая версия /test/resol (server-sent events): сначала формулы
+    посылок и цели, затем строки таблицы шагов по мере вывода и итог.
+
+    По мере вывода отправляется только первая страница шагов (вид all);
+    остальные страницы (и первая страница других видов — в итоге, полем
+    rows) клиент получает из сохранённой трассы через /api/v1/traces/<id>.
+    """
+    premises_raw = request.args.get("premises", "").strip().split("\n")
+    goal_raw = request.args.get("goal", "").strip()
+    use_llm_only = request.args.get("use_llm_only") == "true"
+    view = request.args.get("steps_view", "all")
+    step_row = get_template_attribute("_resolution_step.html", "step_row")
+
+    def generate():
+        # Первый байт уходит сразу, ещё до конвертации (она может ждать LLM)
+        yield ": start\n\n"
+        texts = [p for p in premises_raw if p.strip()] + [goal_raw]
+        *converted_premises, converted_goal = get_fols_with_fallback(texts, converter, use_llm_only)
+        yield sse("formulas", {
+            "premises": [str(highlight_fol_filter(fol)) for fol, _ in converted_premises],
+            "goal": str(highlight_fol_filter(converted_goal[0])),
+        })
+
+        live = view == "all"
+        # Для вида proof полная трасса не собирается: доказательство приходит в итоге
+        keep_trace = view != "proof"
+        # Шаги сверх первой страницы сразу пишутся в базу, в памяти их нет
+        recorder = Traces.TraceRecorder()
         try:
-            fol_from_neuro = ensemble(text)
-            return f"{fol_from_neuro.strip()}" 
-        except Exception as e:
-            return f""
-        
-    return fol_result
+            for event in resolution_events(converted_premises, converted_goal, keep_trace):
+                if event["type"] == "result":
+                    result = event["result"]
+                    if keep_trace:
+                        recorder.finish(result, event.get("proof", []))
+                        page = recorder.first_page(view) if recorder.total else None
+                    else:
+                        # доказательство невелико и не сохраняется: отдаётся целиком
+                        page = Traces.whole_page(event.get("proof", []), view)
+                    data = {
+                        "result": result,
+                        "failed": "FAILURE" in result or "Ошибка" in result,
+                        "steps": recorder.total if keep_trace else None,
+                        "shown": page["total"] if page else 0,
+                        "pages": page["pages"] if page else 0,
+                        "trace": trace_url(page),
+                    }
+                    rows = []
+                    if page and not live:
+                        rows = page["steps"]
+                    elif page and page["id"] is None:
+                        # трасса осталась в памяти (нет базы): досылаем шаги сверх отправленных
+                        rows = page["steps"][Traces.TRACE_PAGE_SIZE:]
+                    if rows:
+                        data["rows"] = [str(step_row(step)) for step in rows]
+                    yield sse("result", data)
+                    return
+                recorder.add(event["step"])
+                if live and recorder.total <= Traces.TRACE_PAGE_SIZE:
+                    yield sse("step", {"html": str(step_row(event["step"]))})
+        finally:
+            # клиент отключился до итога — незавершённая трасса удаляется
+            recorder.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @main_bp.route("/test/resol", methods=["GET", "POST"])
 def resolution_test():
@@ -163,17 +350,22 @@ def resolution_test():
     premises_raw = request.form.get("premises", "").strip().split("\n")
     goal_raw = request.form.get("goal", "").strip()
     use_llm_only = request.form.get("use_llm_only") == "true"
+    steps_view = request.form.get("steps_view", "all")
     
-    fol_premises = [get_fol_with_fallback(p, converter, use_llm_only) for p in premises_raw if p.strip()]
-    fol_goal = get_fol_with_fallback(goal_raw, converter, use_llm_only)
-    
-    has_error = any("[Ошибка]" in fol for fol in fol_premises) or "[Ошибка]" in fol_goal
-
-    if has_error:
-        result = "FAILURE: Невозможно запустить резолюцию из-за ошибок в конвертации одной или нескольких формул."
-        steps = []
+    # Посылки и цель конвертируются вместе, чтобы неразобранные ушли в LLM одним пакетом
+    texts = [p for p in premises_raw if p.strip()] + [goal_raw]
+    *converted_premises, (fol_goal, goal_formula) = get_fols_with_fallback(texts, converter, use_llm_only)
+    fol_premises = [fol for fol, _ in converted_premises]
+    # На страницу попадает только первая страница шагов, остальные пишутся
+    # в базу по мере вывода и подгружаются клиентом
+    if steps_view != "proof":
+        recorder = Traces.TraceRecorder()
+        result, _ = record_resolution(converted_premises, (fol_goal, goal_formula), recorder)
+        steps_page = recorder.first_page(steps_view) if recorder.total else None
     else:
-        result, steps = run_resolution(fol_premises, fol_goal)
+        # Для вида proof полная трасса не собирается — только доказательство
+        result, _, proof = resolve_converted(converted_premises, (fol_goal, goal_formula), keep_trace=False)
+        steps_page = Traces.whole_page(proof, steps_view)
 
     return render_template("resolution.html",
                            premises="\n".join(premises_raw),
@@ -181,17 +373,54 @@ def resolution_test():
                            fol_premises=fol_premises,
                            fol_goal=fol_goal,
                            result=result,
-                           resolution_steps=steps,
+                           resolution_steps=steps_page["steps"] if steps_page else [],
+                           steps_page=steps_page,
+                           trace_url=trace_url(steps_page),
+                           steps_view=steps_view,
                            use_llm_only=use_llm_only)
     
+# Подсветка формул за один проход. Предикат — идентификатор парсера формул
+# (Resolution.IDENTIFIER_TOKEN) с заглавной буквы перед "(". Слова берутся
+# целиком (\w+, как граница \b), поэтому x_1 и ру_Man размечаются как раньше
+HIGHLIGHT_RE = re.compile(r"(?P<special>[∀∃¬])|(?P<word>\w+)(?P<call>\s*\()?")
+PREDICATE_RE = re.compile(f"(?=[A-Z]){IDENTIFIER_TOKEN}")
+SUBSCRIPT_RE = re.compile(r"_([a-zA-Z0-9]+)")
+HIGHLIGHT_VARIABLES = {"x", "y", "z", "k", "w"}
+HIGHLIGHT_CACHE_SIZE = int(os.getenv("HIGHLIGHT_CACHE_SIZE", "8192"))
+
+
+@lru_cache(maxsize=HIGHLIGHT_CACHE_SIZE)
+def highlight_fol(text: str) -> str:
+    """
+    HTML-подсветка формулы: кванторы, отрицание, переменные, предикаты
+    и нижние индексы (`_1`). Остальной текст экранируется. Результат
+    кешируется: в трассе резолюции одни и те же клаузы повторяются.
+    """
+    out = []
+    position = 0
+    for m in HIGHLIGHT_RE.finditer(text):
+        out.append(html.escape(text[position:m.start()], quote=False))
+        position = m.end()
+        special = m.group("special")
+        if special:
+            css = "neg" if special == "¬" else "quantifier"
+            out.append(f'<span class="{css}">{special}</span>')
+            continue
+
+        word, call = m.group("word"), m.group("call")
+        marked = SUBSCRIPT_RE.sub(r"<sub>\1</sub>", word) if "_" in word else word
+        if word in HIGHLIGHT_VARIABLES:
+            out.append(f'<span class="var">{word}</span>{html.escape(call or "", quote=False)}')
+        elif call and PREDICATE_RE.fullmatch(word):
+            out.append(f'<span class="predicate">{marked}</span>(')
+        else:
+            out.append(marked + html.escape(call or "", quote=False))
+    out.append(html.escape(text[position:], quote=False))
+    return "".join(out)
+
+
 @main_bp.app_template_filter("highlight_fol")
 def highlight_fol_filter(text: str):
     if not text:
         return ""
-    text = re.sub(r"(∀|∃)", r'<span class="quantifier">\1</span>', text)
-    text = re.sub(r"\b([xyzkw])\b", r'<span class="var">\1</span>', text)
-    text = re.sub(r"\b([A-Z][a-zA-Z0-9_]*)\s*\(",
-                  r'<span class="predicate">\1</span>(', text)
-    text = re.sub(r"(¬)", r'<span class="neg">\1</span>', text)
-    text = re.sub(r'_([a-zA-Z0-9]+)', r'<sub>\1</sub>', text)
-    return text
+    return highlight_fol(str(text))
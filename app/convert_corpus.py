@@ -0,0 +1,200 @@
+'''
+Потоковое преобразование корпуса предложений в FOL (офлайн, без веб-интерфейса).
+
+Читает предложения из JSONL или CSV, разбирает их через `nlp.pipe`
+(при необходимости в нескольких процессах) и построчно пишет результаты
+`(text, pattern, fol, error)` в CSV или JSONL. Прогресс сохраняется в файл
+контрольной точки, поэтому прерванную задачу можно продолжить с места остановки.
+
+Пример:
+    python convert_corpus.py corpus.jsonl result.csv --n-process 4
+    python convert_corpus.py corpus.jsonl result.csv --n-process 4   # продолжит после сбоя
+'''
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import Iterator, Optional, Tuple
+
+from utilities.FolConvertion import FolConverterEn, ERROR_MESSAGE
+
+FIELDS = ["text", "pattern", "fol", "error"]
+
+
+def read_sentences(path: str, text_field: str) -> Iterator[Tuple[str, str]]:
+    """
+    Лениво читает предложения из JSONL или CSV.
+
+    Строка JSONL — объект с полем `text_field` или просто JSON-строка.
+    Для CSV текст берётся из колонки `text_field`.
+
+    Yields:
+        Tuple[str, str]: Текст предложения и сообщение об ошибке чтения (или "").
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                text = row.get(text_field)
+                if text is None:
+                    yield "", f"Нет колонки '{text_field}'"
+                else:
+                    yield text, ""
+            return
+
+        for line in f:
+            if not line.strip():
+                yield "", "Пустая строка"
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield "", f"Некорректный JSON: {e}"
+                continue
+            if isinstance(item, str):
+                yield item, ""
+            elif isinstance(item, dict) and isinstance(item.get(text_field), str):
+                yield item[text_field], ""
+            else:
+                yield "", f"Нет поля '{text_field}'"
+
+
+class ResultWriter:
+    """
+    Построчная запись результатов в CSV или JSONL (по расширению файла).
+    """
+
+    def __init__(self, path: str, offset: Optional[int]):
+        self.path = path
+        self.is_csv = path.endswith(".csv")
+        if offset is None:
+            self.file = open(path, "w", encoding="utf-8", newline="")
+        else:
+            # Отбрасываем всё, что было записано после последней контрольной точки
+            self.file = open(path, "r+", encoding="utf-8", newline="")
+            self.file.seek(offset)
+            self.file.truncate()
+        self.csv = csv.writer(self.file) if self.is_csv else None
+        if self.is_csv and offset is None:
+            self.csv.writerow(FIELDS)
+
+    def write(self, row: Tuple[str, str, str, str]):
+        if self.is_csv:
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n")
+
+    def sync(self) -> int:
+        """Сбрасывает данные на диск и возвращает текущее смещение в файле."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def load_checkpoint(path: str, input_path: str) -> Tuple[int, Optional[int]]:
+    """
+    Возвращает (число обработанных строк, смещение в выходном файле).
+    Если контрольной точки нет, возвращает (0, None).
+    """
+    if not os.path.exists(path):
+        return 0, None
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("input") != os.path.abspath(input_path):
+        raise SystemExit(f"Контрольная точка {path} относится к другому входному файлу: {state.get('input')}")
+    return state["rows"], state["offset"]
+
+
+def save_checkpoint(path: str, input_path: str, rows: int, offset: int):
+    """Атомарно сохраняет прогресс (через временный файл и os.replace)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"input": os.path.abspath(input_path), "rows": rows, "offset": offset}, f)
+    os.replace(tmp, path)
+
+
+def convert_row(converter: FolConverterEn, doc, read_error: str) -> Tuple[str, str, str]:
+    """Возвращает (pattern, fol, error) для одного разобранного предложения."""
+    if read_error:
+        return "", "", read_error
+    try:
+        pattern, fol = converter.convert_doc(doc)
+    except Exception as e:
+        return "", "", f"{type(e).__name__}: {e}"
+    if pattern is None:
+        return "", "", ERROR_MESSAGE
+    return str(pattern), fol, ""
+
+
+def positive_int(value: str) -> int:
+    """Тип аргумента argparse: целое число не меньше 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидалось целое число, получено {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"должно быть не меньше 1, получено {number}")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Потоковое преобразование корпуса предложений в FOL.")
+    parser.add_argument("input", help="Входной файл: .jsonl или .csv")
+    parser.add_argument("output", help="Выходной файл: .csv или .jsonl")
+    parser.add_argument("--text-field", default="text", help="Поле/колонка с предложением (по умолчанию: text)")
+    parser.add_argument("--model", default="en_core_web_sm", help="Модель spaCy")
+    parser.add_argument("--batch-size", type=positive_int, default=256, help="Размер пакета nlp.pipe")
+    parser.add_argument("--n-process", type=int, default=1, help="Число процессов разбора")
+    parser.add_argument("--checkpoint-every", type=positive_int, default=10000,
+                        help="Через сколько строк сохранять контрольную точку")
+    parser.add_argument("--restart", action="store_true",
+                        help="Игнорировать контрольную точку и начать заново")
+    args = parser.parse_args(argv)
+
+    checkpoint = args.output + ".ckpt"
+    if args.restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    done, offset = load_checkpoint(checkpoint, args.input)
+    if offset is not None and (not os.path.exists(args.output) or os.path.getsize(args.output) < offset):
+        # выходной файл удалён или обрезан: продолжать не с чего, начинаем заново
+        print(f"Выходной файл {args.output} не соответствует контрольной точке, начинаем заново", file=sys.stderr)
+        os.remove(checkpoint)
+        done, offset = 0, None
+    if done:
+        print(f"Продолжаем со строки {done}", file=sys.stderr)
+
+    converter = FolConverterEn(args.model)
+    writer = ResultWriter(args.output, offset)
+
+    rows = islice(read_sentences(args.input, args.text_field), done, None)
+    docs = converter.nlp.pipe(
+        ((text, (text, error)) for text, error in rows),
+        as_tuples=True,
+        batch_size=args.batch_size,
+        n_process=args.n_process,
+    )
+
+    started = time.perf_counter()
+    processed = done
+    try:
+        for doc, (text, read_error) in docs:
+            writer.write((text,) + convert_row(converter, doc, read_error))
+            processed += 1
+            if processed % args.checkpoint_every == 0:
+                save_checkpoint(checkpoint, args.input, processed, writer.sync())
+                rate = (processed - done) / (time.perf_counter() - started)
+                print(f"{processed} строк ({rate:.0f} строк/с)", file=sys.stderr)
+        save_checkpoint(checkpoint, args.input, processed, writer.sync())
+    finally:
+        writer.close()
+
+    print(f"Готово: {processed} строк -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+'''
+Локальный сервер-заглушка для LLM-бэкендов (без обращения к облаку).
+
+Отвечает по протоколам, которые использует `utilities.LLMCall`:
+  * OpenAI Responses API (`POST .../responses`) — YandexGPT и Gemma;
+  * GigaChat: получение токена (`POST .../oauth`) и чат (`POST .../chat/completions`).
+
+Задержка ответа и доля ошибок настраиваются, поэтому на сервере можно
+воспроизводимо проверять параллельность, кеширование и таймауты слоя LLM.
+Статистика запросов: `GET /stats`.
+
+Пример:
+    python fake_llm_server.py --port 8765 --latency lognormal:0.8,0.5 --error-rate 0.05
+    export YANDEX_CLOUD_BASE_URL=http://127.0.0.1:8765/v1
+    export GIGACHAT_BASE_URL=http://127.0.0.1:8765/v1
+    export GIGACHAT_AUTH_URL=http://127.0.0.1:8765/api/v2/oauth
+'''
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+# Ответы-заглушки: выбираются детерминированно по тексту промпта
+ANSWERS = [
+    "∀x (man(x) → mortal(x))",
+    "∃x (student(x) ∧ smart(x))",
+    "∀x (dog(x) → ¬barks(x))",
+    "∀x (man(x) → ∃y (woman(y) ∧ loves(x,y)))",
+]
+EXPLANATION = (
+    "\n\nExplanation: the universal quantifier ranges over the subject noun phrase, "
+    "the restriction is expressed by implication and the predicate follows the verb."
+)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Разбирает описание распределения задержки (в секундах).
+
+    Форматы: `0.5` или `fixed:0.5`, `uniform:0.2,1.0`,
+    `lognormal:<медиана>,<sigma>`, `normal:<среднее>,<sigma>`.
+    """
+    kind, _, params = spec.partition(":")
+    if not params:
+        kind, params = "fixed", kind
+    values = [float(v) for v in params.split(",")]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        import math
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    raise ValueError(f"Неизвестное распределение задержки: {spec}")
+
+
+class Profile:
+    """Поведение одного бэкенда: распределение задержки и доля ошибок (HTTP 500)."""
+
+    def __init__(self, latency: str = "0", error_rate: float = 0.0):
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, profiles: Dict[str, Profile], seed: Optional[int] = None,
+                 token_latency: float = 0.0, explanation: bool = False):
+        super().__init__(address, FakeLLMHandler)
+        self.profiles = profiles
+        # Задержка на каждый фрагмент в потоковом режиме и пояснение после формулы
+        self.token_latency = token_latency
+        self.explanation = explanation
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+        self.stats_lock = threading.Lock()
+
+    def count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def sample(self, backend: str):
+        """Возвращает (задержка, ошибка ли) для очередного запроса."""
+        profile = self.profiles.get(backend, self.profiles["default"])
+        with self.rng_lock:
+            return profile.latency(self.rng), self.rng.random() < profile.error_rate
+
+
+def answer_for(prompt: str) -> str:
+    digest = hashlib.md5(prompt.encode("utf-8")).digest()
+    return ANSWERS[digest[0] % len(ANSWERS)]
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    server: FakeLLMServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.server.stats_lock:
+                self._send(200, dict(self.server.stats))
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        raw = self._read_body()
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/oauth") or path.endswith("/token"):
+            self.server.count("giga_auth")
+            self._send(200, {
+                "access_token": uuid.uuid4().hex,
+                "expires_at": int((time.time() + 1800) * 1000),
+            })
+            return
+
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            self._send(400, {"error": "invalid json"})
+            return
+
+        if path.endswith("/responses"):
+            model = str(body.get("model", ""))
+            backend = "gemma" if "gemma" in model else "yandex"
+            prompt = body.get("input") if isinstance(body.get("input"), str) else json.dumps(body.get("input"))
+            if body.get("stream"):
+                self._reply_stream(backend, prompt, model)
+            else:
+                self._reply(backend, prompt, lambda text: self._responses_body(model, text))
+        elif path.endswith("/chat/completions"):
+            messages = body.get("messages") or [{}]
+            prompt = str(messages[-1].get("content", ""))
+            self._reply("giga", prompt, lambda text: self._chat_body(body.get("model") or "GigaChat-2", text))
+        else:
+            self._send(404, {"error": "not found"})
+
+    def _reply(self, backend: str, prompt: str, build: Callable[[str], dict]):
+        self.server.count(backend)
+        latency, failed = self.server.sample(backend)
+        time.sleep(latency)
+        if failed:
+            self.server.count(f"{backend}_errors")
+            self._send(500, {"error": {"message": "injected failure", "type": "server_error"}})
+            return
+        self._send(200, build(self._answer(prompt)))
+
+    def _answer(self, prompt: str) -> str:
+        text = answer_for(prompt)
+        if self.server.explanation:
+            text += EXPLANATION
+        return text
+
+    def _reply_stream(self, backend: str, prompt: str, model: str):
+        """Ответ Responses API потоком событий (SSE), по одному слову на событие."""
+        self.server.count(backend)
+        latency, failed = self.server.sample(backend)
+        time.sleep(latency)
+        if failed:
+            self.server.count(f"{backend}_errors")
+            self._send(500, {"error": {"message": "injected failure", "type": "server_error"}})
+            return
+
+        text = self._answer(prompt)
+        chunks = re.findall(r"\s*\S+|\s+", text)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        item_id = f"msg_{uuid.uuid4().hex}"
+        events = [{"type": "response.created", "response": self._responses_body(model, "")}]
+        events += [
+            {"type": "response.output_text.delta", "item_id": item_id, "output_index": 0,
+             "content_index": 0, "delta": chunk, "logprobs": []}
+            for chunk in chunks
+        ]
+        events.append({"type": "response.completed", "response": self._responses_body(model, text)})
+        try:
+            for number, event in enumerate(events):
+                event["sequence_number"] = number
+                data = json.dumps(event, ensure_ascii=False)
+                self.wfile.write(f"event: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if event["type"] == "response.output_text.delta":
+                    self.server.count(f"{backend}_stream_chunks")
+                    time.sleep(self.server.token_latency)
+        except (BrokenPipeError, ConnectionResetError):
+            # клиент закрыл поток раньше конца ответа
+            self.server.count(f"{backend}_stream_cancelled")
+
+    @staticmethod
+    def _responses_body(model: str, text: str) -> dict:
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": model,
+            "status": "completed",
+            "output": [{
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": 0, "output_tokens": 0, "total_tokens": 0,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens_details": {"reasoning_tokens": 0},
+            },
+        }
+
+    @staticmethod
+    def _chat_body(model: str, text: str) -> dict:
+        return {
+            "choices": [{"message": {"role": "assistant", "content": text}, "index": 0, "finish_reason": "stop"}],
+            "created": int(time.time()),
+            "model": model,
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            "object": "chat.completion",
+        }
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, profiles: Optional[Dict[str, Profile]] = None,
+                 seed: Optional[int] = None, **options) -> FakeLLMServer:
+    """Запускает сервер в фоновом потоке (port=0 — любой свободный) и возвращает его."""
+    server = FakeLLMServer((host, port), profiles or {"default": Profile()}, seed, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def client_env(server: FakeLLMServer) -> Dict[str, str]:
+    """Переменные окружения, направляющие LLMCall на этот сервер."""
+    host, port = server.server_address[:2]
+    base = f"http://{host}:{port}"
+    return {
+        "YANDEX_CLOUD_BASE_URL": f"{base}/v1",
+        "YANDEX_CLOUD_API_KEY": "fake",
+        "YANDEX_CLOUD_FOLDER": "fake",
+        "GIGACHAT_BASE_URL": f"{base}/v1",
+        "GIGACHAT_AUTH_URL": f"{base}/api/v2/oauth",
+        "GIGA_CLIENT_ID": "fake",
+        "GIGA_CLIENT_SECRET": "fake",
+    }
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", default="0.5",
+                        help="Задержка по умолчанию: 0.5 | uniform:a,b | lognormal:median,sigma | normal:mean,sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой 500")
+    for backend in ("yandex", "gemma", "giga"):
+        parser.add_argument(f"--{backend}-latency", help=f"Задержка для {backend} (вместо --latency)")
+        parser.add_argument(f"--{backend}-error-rate", type=float, help=f"Доля ошибок для {backend}")
+    parser.add_argument("--seed", type=int, default=None, help="Зерно генератора (воспроизводимость)")
+    parser.add_argument("--token-latency", type=float, default=0.0,
+                        help="Задержка на каждый фрагмент потокового ответа, с")
+    parser.add_argument("--explanation", action="store_true",
+                        help="Добавлять к формуле пояснение (как многословная модель)")
+
+
+def profiles_from_args(args) -> Dict[str, Profile]:
+    profiles = {"default": Profile(args.latency, args.error_rate)}
+    for backend in ("yandex", "gemma", "giga"):
+        latency = getattr(args, f"{backend}_latency")
+        error_rate = getattr(args, f"{backend}_error_rate")
+        if latency is not None or error_rate is not None:
+            profiles[backend] = Profile(
+                latency if latency is not None else args.latency,
+                error_rate if error_rate is not None else args.error_rate,
+            )
+    return profiles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный сервер-заглушка для YandexGPT/Gemma и GigaChat.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeLLMServer((args.host, args.port), profiles_from_args(args), args.seed,
+                           token_latency=args.token_latency, explanation=args.explanation)
+    for key, value in client_env(server).items():
+        print(f"export {key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
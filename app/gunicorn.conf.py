@@ -0,0 +1,55 @@
+'''
+Профиль запуска в продакшене: gunicorn с несколькими процессами и потоками.
+
+Приложение загружается в главном процессе до fork (preload_app), а модели
+spaCy и клиенты — в хуке when_ready, поэтому воркеры разделяют их память
+copy-on-write.
+Все параметры задаются переменными окружения.
+
+    gunicorn -c gunicorn.conf.py app:app
+'''
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", str(min(multiprocessing.cpu_count(), 4))))
+# gthread: потоки внутри воркера обслуживают долгие ответы (SSE, ожидание заданий)
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "8"))
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# Перезапуск воркера после N запросов ограничивает рост памяти
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "2000"))
+max_requests_jitter = 200
+preload_app = True
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+accesslog = "-"
+
+
+def when_ready(server):
+    # Главный процесс, приложение уже загружено (preload_app): модели
+    # загружаются здесь один раз и достаются воркерам через fork
+    from blueprints.main import warm_up
+    from utilities.Startup import report
+
+    warm_up()
+    server.log.info("Время запуска:\n%s", report())
+
+
+def pre_fork(server, worker):
+    # Объекты, созданные при загрузке, больше не трогает сборщик мусора —
+    # иначе он записывал бы в страницы памяти и ломал copy-on-write
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Соединения с базой из главного процесса нельзя использовать после fork.
+    # close=False: пул воркера забывает их, не закрывая — сокеты принадлежат
+    # главному процессу, и закрытие в дочернем сломало бы их и там
+    from app import app
+    from utilities.db import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
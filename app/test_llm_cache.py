@@ -0,0 +1,72 @@
+'''
+Проверка кеша итогового ответа ансамбля: повторный /test/resol с теми же
+предложениями не обращается к моделям. Бэкенды подменяются счётчиком, модель
+spaCy — пустым конвейером (без разбора все предложения уходят в ансамбль).
+
+    python test_llm_cache.py
+'''
+import spacy
+from flask import Flask
+
+from utilities import FolConvertion, LLMCache, LLMCall
+
+FolConvertion._models["en_core_web_sm"] = spacy.blank("en")
+
+from blueprints.main import main_bp  # noqa: E402
+
+app = Flask(__name__)
+app.register_blueprint(main_bp)
+
+ANSWERS = {
+    "Every man is mortal.": "∀x (Man(x) → Mortal(x))",
+    "Socrates is a man.": "Man(Socrates)",
+    "Socrates is mortal.": "Mortal(Socrates)",
+}
+calls = []
+
+
+def fake_answer(prompt):
+    sentence = next(s for s in ANSWERS if s in prompt)
+    return ANSWERS[sentence]
+
+
+def fake_fetch_response(model, prompt, temp):
+    calls.append(model)
+    return fake_answer(prompt)
+
+
+def fake_fetch_giga(prompt, temp):
+    calls.append(LLMCall.GIGA_MODEL)
+    return fake_answer(prompt)
+
+
+def test_repeated_resolution_uses_cache():
+    LLMCache._cache = LLMCache.ResponseCache(path=None)
+    fetch_response, fetch_giga = LLMCall._fetch_response, LLMCall._fetch_giga
+    LLMCall._fetch_response, LLMCall._fetch_giga = fake_fetch_response, fake_fetch_giga
+    try:
+        client = app.test_client()
+        form = {"premises": "Every man is mortal.\nSocrates is a man.", "goal": "Socrates is mortal."}
+        first = client.post("/test/resol", data=form)
+        assert first.status_code == 200
+        assert "ВЫВОДИТСЯ" in first.get_data(as_text=True)
+        assert calls, "первый запрос должен обратиться к моделям"
+
+        calls.clear()
+        second = client.post("/test/resol", data=form)
+        assert second.status_code == 200
+        assert "ВЫВОДИТСЯ" in second.get_data(as_text=True)
+        assert calls == [], f"повторный запрос обратился к моделям: {calls}"
+    finally:
+        LLMCall._fetch_response, LLMCall._fetch_giga = fetch_response, fetch_giga
+        LLMCache._cache = None
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"SUCCESS: {name}")
+            except AssertionError as e:
+                print(f"FAILED: {name} -> {e!r}")
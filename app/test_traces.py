@@ -0,0 +1,96 @@
+'''
+Проверки хранения трасс резолюции (utilities/Traces.py) на SQLite в памяти.
+
+    python test_traces.py
+'''
+from flask import Flask
+
+from utilities import Traces
+from utilities.db import db, TraceStep
+from utilities.Resolution import iter_resolution
+
+app = Flask(__name__)
+app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db.init_app(app)
+
+INFO_LENGTH = TraceStep.__table__.c.info.type.length
+
+
+def resolve_events(premises, goal):
+    steps, result, proof = [], "ERROR", []
+    for event in iter_resolution(premises, goal, keep_trace=True):
+        if event["type"] == "result":
+            result, proof = event["result"], event.get("proof", [])
+        else:
+            steps.append(event["step"])
+    return result, steps, proof
+
+
+def test_save_trace_with_parse_error():
+    """Трасса для неразбираемой посылки сохраняется; текст ошибки остаётся в шаге."""
+    with app.app_context():
+        db.create_all()
+        result, steps, proof = resolve_events(["∀x (Man(x) → "], "Mortal(Socrates)")
+        assert result == "ERROR"
+        assert len(steps[0]["info"]) > INFO_LENGTH
+
+        trace_id = Traces.save_trace(result, steps, proof)
+        rows = TraceStep.query.filter_by(trace_id=trace_id).all()
+        assert [row.info for row in rows] == ["Error"]
+        assert all(len(row.info) <= INFO_LENGTH for row in rows)
+
+        page = Traces.load_page(trace_id)
+        assert page["result"] == "ERROR"
+        assert page["steps"][0]["info"] == steps[0]["info"]
+        assert Traces.load_page(trace_id, info=["Error"])["total"] == 1
+        db.drop_all()
+
+
+CHAIN = ["P(a)", "∀x (P(x) → Q1(x))", "∀x (Q1(x) → Q2(x))", "∀x (Q2(x) → R(x))", "∀x (N1(x) ∨ N2(x))"]
+
+
+def test_trace_without_database():
+    """Без базы трасса длиннее страницы остаётся в памяти и показывается целиком."""
+    broken = Flask(__name__)
+    broken.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:////nonexistent/dir/traces.sqlite3"
+    db.init_app(broken)
+    result, steps, _ = resolve_events(CHAIN, "R(a)")
+    with broken.app_context():
+        recorder = Traces.TraceRecorder(per_page=5)
+        for step in steps:
+            recorder.add(step)
+        assert recorder.finish(result) is None
+        page = recorder.first_page("all")
+    assert page["id"] is None
+    assert [s["id"] for s in page["steps"]] == [s["id"] for s in steps]
+
+
+def test_interrupted_trace_is_removed():
+    """Трасса, вывод которой прервался до итога, удаляется в close."""
+    Traces.TRACE_WRITE_BATCH, batch = 3, Traces.TRACE_WRITE_BATCH
+    try:
+        with app.app_context():
+            db.create_all()
+            _, steps, _ = resolve_events(CHAIN, "R(a)")
+            recorder = Traces.TraceRecorder(per_page=2)
+            for step in steps[:6]:
+                recorder.add(step)
+            trace_id = recorder.trace_id
+            assert TraceStep.query.filter_by(trace_id=trace_id).count() > 0
+            recorder.close()
+            assert Traces.get_trace(trace_id) is None
+            assert TraceStep.query.filter_by(trace_id=trace_id).count() == 0
+            db.drop_all()
+    finally:
+        Traces.TRACE_WRITE_BATCH = batch
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"SUCCESS: {name}")
+            except AssertionError as e:
+                print(f"FAILED: {name} -> {e!r}")
@@ -1,5 +1,11 @@
-from typing import Any
-from spacy import displacy
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+# Сколько разборов (с их разметкой) держать в кеше
+VISUALIZER_CACHE_SIZE = int(os.getenv("DISPLACY_CACHE_SIZE", "1024"))
+
 
 class DependencyVisualizer:
     """
@@ -7,32 +13,83 @@ class DependencyVisualizer:
 
     Использует библиотеку `spacy.displacy` для создания интерактивного
     дерева, пригодного для встраивания в веб-приложения (например, на Flask).
+
+    Разбор (слова и дуги) и готовая разметка кешируются по ключу разбора:
+    одинаковые предложения с одинаковым разбором повторно не рендерятся.
     """
 
-    def __init__(self, style: str = "dep"):
+    def __init__(self, style: str = "dep", page: bool = False, cache_size: int = VISUALIZER_CACHE_SIZE):
         """
         Инициализирует визуализатор.
 
         Args:
             style (str): Стиль визуализации displacy. По умолчанию: "dep" (зависимости).
+            page (bool): Рендерить полноценную HTML-страницу вместо SVG-фрагмента.
+            cache_size (int): Размер LRU-кеша разборов и разметки (0 — без кеша).
         """
         self.style = style
+        self.page = page
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_key(doc: Any) -> Tuple:
+        """
+        Ключ разбора: слова, части речи, метки и вершины (относительно начала).
+        От него зависит всё, что рисует displacy для стиля dep.
+        """
+        start = doc[0].i if len(doc) else 0
+        return tuple((t.text, t.pos_, t.dep_, t.head.i - start) for t in doc)
+
+    def _cached(self, key: Tuple, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = build()
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[key] = value
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return value
 
-    def render(self, doc: Any) -> str:
+    def parse(self, doc: Any) -> Dict[str, Any]:
+        """
+        Возвращает разбор в формате displacy для отрисовки на клиенте:
+        {"words": [{"text", "tag"}], "arcs": [{"start", "end", "label", "dir"}]}.
+        """
+        from spacy import displacy
+
+        return self._cached(("parse", self.parse_key(doc)), lambda: displacy.parse_deps(doc))
+
+    def render(self, doc: Any, page: bool = None) -> str:
         """
         Преобразует объект spaCy Doc в HTML-строку с визуализацией зависимостей.
 
         Args:
             doc: Обработанный документ или спан spaCy (spacy.tokens.Doc | Span).
+            page (bool | None): Полная HTML-страница вместо SVG-фрагмента
+                (по умолчанию — как задано в конструкторе).
 
         Returns:
-            str: HTML-строка с визуализацией displacy.
+            str: SVG-разметка или HTML-страница с визуализацией displacy.
         """
+        from spacy import displacy
+
+        page = self.page if page is None else page
+        if self.style != "dep":
+            # ключ кеша строится по разбору зависимостей — другие стили не кешируются
+            return displacy.render(doc, style=self.style, page=page, minify=True)
+
+        def build():
+            return displacy.render(
+                self.parse(doc),
+                style=self.style,
+                page=page,         # Полноценная web-страница или только SVG для встраивания
+                minify=True,       # Убирает пробелы, чтобы HTML был компактным
+                manual=True,       # Разбор уже готов (и закеширован) — displacy его не повторяет
+            )
 
-        html = displacy.render(
-            doc,
-            style=self.style,
-            page=True,         # Генерирует полноценную web-страницу (можно выключить)
-            minify=True        # Убирает пробелы, чтобы HTML был компактным
-        )
-        return html
+        return self._cached(("html", page, self.parse_key(doc)), build)
@@ -1,7 +1,6 @@
-from typing import Dict, Optional
-import spacy
-from utilities.patterns import PATTERNS
+from typing import Any, Dict, Optional
 from utilities.DependencyVisualizer import DependencyVisualizer
+from utilities.FolConvertion import load_model
 
 class FolAnalyzerEn:
     """
@@ -16,48 +15,68 @@ class FolAnalyzerEn:
     
     def __init__(self, model: str = "en_core_web_sm"):
         """
-        Инициализирует анализатор, загружая модель spaCy и необходимые инструменты.
+        Инициализирует анализатор. Модель spaCy (общая с конвертером) и паттерны
+        загружаются при первом обращении.
 
         Args:
             model (str): Название модели spaCy для загрузки. По умолчанию: "en_core_web_sm".
         """
-        self.nlp = spacy.load(model)
+        self.model = model
         self.visualizer = DependencyVisualizer()
-        self.patterns = PATTERNS
+        self._factory = None
 
-    def analyze(self, text: str) -> Dict[str, Optional[str]]:
+    @property
+    def nlp(self) -> Any:
+        return load_model(self.model)
+
+    @property
+    def factory(self) -> Any:
+        if self._factory is None:
+            from utilities.PatternFactory import PatternFactory
+
+            self._factory = PatternFactory()
+        return self._factory
+
+    def analyze(self, text: str, tree: Optional[str] = "svg") -> Dict[str, Any]:
         """
         Принимает текст, анализирует его и возвращает структурированный результат.
 
         
 
-        Выполняет последовательный перебор зарегистрированных паттернов,
-        пока не будет найден первый подходящий (`pattern.match(doc)`).
+        Паттерн выбирается через PatternFactory: по сигнатуре зависимостей
+        корня отбираются кандидаты, первый подтвердивший `match` применяется.
 
         Args:
             text (str): Входное предложение на английском языке.
+            tree (str | None): Вид дерева зависимостей: "svg" — SVG-фрагмент,
+                "page" — полная HTML-страница displacy, "arcs" — слова и дуги
+                для отрисовки на клиенте, None — без дерева.
 
         Returns:
-            Dict[str, Optional[str]]: Словарь с результатами:
+            Dict[str, Any]: Словарь с результатами:
                 - **fol (str)**: Строка с формулой FOL или сообщение об ошибке.
-                - **tree_html (str)**: HTML-код для визуализации дерева зависимостей.
+                - **tree_html (str | None)**: HTML/SVG-код дерева зависимостей ("svg" и "page").
+                - **tree_arcs (dict)**: Слова и дуги дерева (только для "arcs").
                 - **pattern (str | None)**: Имя примененного паттерна (например, "SVO") или None в случае ошибки.
         """
         doc = self.nlp(text)
 
         # Поиск подходящего паттерна
-        for pattern in self.patterns:
-            if pattern.match(doc):
-                fol = pattern.convert(doc)
-                break
+        pattern = self.factory.get_pattern(doc)
+        if pattern:
+            fol = pattern.convert(doc)
         else:
             fol = "[Ошибка] Не найден подходящий паттерн."
 
-        # HTML дерево зависимостей
-        tree_html = self.visualizer.render(doc)
-
-        return {
+        result = {
             "fol": fol,
-            "tree_html": tree_html,
+            "tree_html": None,
             "pattern": str(pattern) if fol[0] != "[" else None
         }
+
+        # Дерево зависимостей (разметка и разбор кешируются визуализатором)
+        if tree == "arcs":
+            result["tree_arcs"] = self.visualizer.parse(doc)
+        elif tree in ("svg", "page"):
+            result["tree_html"] = self.visualizer.render(doc, page=tree == "page")
+        return result
@@ -1,6 +1,32 @@
-from typing import Any, Optional
-import spacy
-from utilities.PatternFactory import PatternFactory
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+
+ERROR_MESSAGE = "[Ошибка] Не удалось определить тип предложения."
+
+# Загруженные модели spaCy: имя -> Language (одна копия на процесс)
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+
+def load_model(model: str) -> Any:
+    """
+    Загружает модель spaCy при первом обращении и дальше отдаёт ту же копию,
+    поэтому конвертер и анализатор с одной моделью не грузят её дважды.
+    """
+    nlp = _models.get(model)
+    if nlp is None:
+        with _models_lock:
+            nlp = _models.get(model)
+            if nlp is None:
+                import spacy
+
+                nlp = spacy.load(model)
+                _models[model] = nlp
+    return nlp
+
+
+def model_loaded(model: str) -> bool:
+    return model in _models
 
 
 class FolConverterEn:
@@ -11,19 +37,119 @@ class FolConverterEn:
     и не включает визуализацию
 
     ОГРАНИЧЕНИЯ:
-    - Работает только с простыми предложениями.
+    - Работает только с простыми предложениями (текст из нескольких предложений
+      обрабатывается через `convert_document` — каждое предложение отдельно).
     - Не обрабатывает модальность, сложные структуры и т.д.
     """
 
     def __init__(self, model: str = "en_core_web_sm"):
         """
-        Инициализирует конвертер и загружает модель spaCy.
+        Инициализирует конвертер. Модель spaCy и паттерны загружаются
+        при первом обращении к `nlp` / `factory` (см. `load_model`).
 
         Args:
             model (str): Название модели spaCy для загрузки. По умолчанию: "en_core_web_sm".
         """
-        self.nlp = spacy.load(model)
-        self.factory = PatternFactory()
+        self.model = model
+        self._factory = None
+
+    @property
+    def nlp(self) -> Any:
+        return load_model(self.model)
+
+    @property
+    def factory(self) -> Any:
+        if self._factory is None:
+            from utilities.PatternFactory import PatternFactory
+
+            self._factory = PatternFactory()
+        return self._factory
+
+    def convert_doc(self, doc: Any) -> Tuple[Optional[Any], str]:
+        """
+        Выбирает паттерн и преобразует уже разобранный документ или спан.
+
+        Args:
+            doc: Документ или предложение (spacy.tokens.Doc | Span).
+
+        Returns:
+            Tuple[Optional[Any], str]: Паттерн (или None) и формула FOL
+            либо сообщение об ошибке.
+        """
+        pattern = self.factory.get_pattern(doc)
+        if not pattern:
+            return None, ERROR_MESSAGE
+
+        return pattern, pattern.convert(doc)
+
+    def convert_to_formula(self, text: str) -> Tuple[str, Optional[Any]]:
+        """
+        Преобразует предложение в формулу FOL и возвращает её также в виде дерева.
+
+        Дерево (utilities.Resolution.Formula) можно передать в `run_resolution`
+        напрямую, без повторного разбора строки.
+
+        Args:
+            text (str): Входное предложение.
+
+        Returns:
+            Tuple[str, Optional[Any]]: Строка формулы (или сообщение об ошибке)
+            и дерево формулы (None, если построить не удалось).
+        """
+        from utilities.patterns.formula import render
+
+        doc = self.nlp(text)
+
+        pattern = self.factory.get_pattern(doc)
+        if not pattern:
+            return ERROR_MESSAGE, None
+
+        formula = pattern.convert_formula(doc)
+        if formula is None:
+            return pattern.convert(doc), None
+        return render(formula), formula
+
+    def convert_document(self, text: str) -> List[Dict[str, Optional[str]]]:
+        """
+        Преобразует текст из нескольких предложений за один проход модели.
+
+        Модель применяется к тексту один раз, затем паттерн выбирается
+        отдельно для каждого предложения (`doc.sents`).
+
+        Args:
+            text (str): Входной текст (одно или несколько предложений).
+
+        Returns:
+            List[Dict[str, Optional[str]]]: По словарю на предложение:
+                - **sentence (str)**: Текст предложения.
+                - **pattern (str | None)**: Имя паттерна или None.
+                - **fol (str)**: Формула FOL или сообщение об ошибке.
+        """
+        doc = self.nlp(text)
+
+        results = []
+        for sent in doc.sents:
+            pattern, fol = self.convert_doc(sent)
+            results.append({
+                "sentence": sent.text,
+                "pattern": str(pattern) if pattern else None,
+                "fol": fol,
+            })
+        return results
+
+    def convert_many(self, texts: List[str], batch_size: int = 256) -> List[Tuple[Optional[Any], str]]:
+        """
+        Преобразует список предложений, разбирая их пакетами (`nlp.pipe`).
+
+        Args:
+            texts (List[str]): Предложения.
+            batch_size (int): Размер пакета nlp.pipe.
+
+        Returns:
+            List[Tuple[Optional[Any], str]]: Для каждого предложения паттерн
+            (или None) и формула FOL либо сообщение об ошибке.
+        """
+        return [self.convert_doc(doc) for doc in self.nlp.pipe(texts, batch_size=batch_size)]
 
     def get_pattern(self, text: str) -> Optional[Any]:
         """
@@ -39,7 +165,7 @@ class FolConverterEn:
 
         pattern = self.factory.get_pattern(doc)
         if not pattern:
-            return "[Ошибка] Не удалось определить тип предложения."
+            return ERROR_MESSAGE
 
         return pattern
 
@@ -55,8 +181,4 @@ class FolConverterEn:
         """
         doc = self.nlp(text)
 
-        pattern = self.factory.get_pattern(doc)
-        if not pattern:
-            return "[Ошибка] Не удалось определить тип предложения."
-
-        return pattern.convert(doc)
\ No newline at end of file
+        return self.convert_doc(doc)[1]
\ No newline at end of file
@@ -0,0 +1,262 @@
+'''
+Очередь фоновых заданий в базе данных (таблица Job, общий объект `db`).
+
+Запрос ставит задание (`submit`) и сразу получает его id; воркеры
+(`worker.py`, отдельные процессы) забирают задания через
+`SELECT ... FOR UPDATE SKIP LOCKED`, поэтому одно задание не достанется двум
+воркерам. Пока задание выполняется, воркер раз в JOB_HEARTBEAT секунд
+продлевает аренду (heartbeat_at); задание возвращается в очередь, только
+если аренда истекла (воркер упал или завис), а не просто потому, что оно
+выполняется долго. Дольше JOB_MAX_RUNTIME аренда не продлевается: задание,
+застрявшее в обработчике, тоже будет возвращено в очередь (или провалено),
+а его запоздавший результат отброшен. Клиент опрашивает статус (`get_job`) или ждёт результата
+(`wait_job`). `stats` отдаёт глубину очереди и времена ожидания/выполнения.
+
+Обработчики регистрируются по виду задания декоратором `job_handler`.
+'''
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import update
+
+from utilities.db import db, Job
+
+# Как часто воркер продлевает аренду выполняемого задания, с
+JOB_HEARTBEAT = float(os.getenv("JOB_HEARTBEAT", "10"))
+# Задание без продления аренды дольше этого времени считается брошенным (воркер упал)
+JOB_LEASE = float(os.getenv("JOB_LEASE", "60"))
+# Дольше этого задание не выполняется: аренда перестаёт продлеваться
+JOB_MAX_RUNTIME = float(os.getenv("JOB_MAX_RUNTIME", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+# По скольким последним заданиям считаются времена в stats
+STATS_WINDOW = 200
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+
+def job_handler(kind: str):
+    """Регистрирует функцию `handler(payload) -> result` для заданий вида `kind`."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def submit(kind: str, payload: Dict[str, Any]) -> Job:
+    """Ставит задание в очередь. Вызывается внутри контекста приложения Flask."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Неизвестный вид задания: {kind}")
+    job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload, status="queued", created_at=time.time())
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    db.session.expire_all()
+    return db.session.get(Job, job_id)
+
+
+def wait_job(job_id: str, timeout: float, poll: float = 0.2) -> Optional[Job]:
+    """Ждёт завершения задания не дольше `timeout` секунд и возвращает его."""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = get_job(job_id)
+        if job is None or job.status in ("done", "failed") or time.monotonic() >= deadline:
+            return job
+        time.sleep(poll)
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    data = {"id": job.id, "kind": job.kind, "status": job.status}
+    if job.status == "done":
+        data["result"] = job.result
+    elif job.status == "failed":
+        data["error"] = job.error
+    if job.started_at:
+        data["wait_s"] = round(job.started_at - job.created_at, 3)
+    if job.finished_at:
+        data["run_s"] = round(job.finished_at - job.started_at, 3)
+    return data
+
+
+def claim_next() -> Optional[Job]:
+    """Забирает самое старое задание из очереди и помечает его как выполняемое."""
+    job = (
+        Job.query.filter_by(status="queued")
+        .order_by(Job.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.session.rollback()
+        return None
+    job.status = "running"
+    job.started_at = time.time()
+    job.heartbeat_at = job.started_at
+    job.attempts += 1
+    db.session.commit()
+    return job
+
+
+@contextmanager
+def heartbeat(job_id: str, deadline: float, interval: float = JOB_HEARTBEAT):
+    """
+    Пока выполняется блок, но не позже `deadline` (время Unix), фоновый поток
+    продлевает аренду задания. Поток пишет через своё соединение, не трогая
+    сессию обработчика.
+    """
+    app = current_app._get_current_object()
+    stop = threading.Event()
+
+    def beat():
+        with app.app_context():
+            while not stop.wait(interval):
+                if time.time() >= deadline:
+                    # задание выполняется слишком долго: аренда истечёт, его заберёт requeue_stale
+                    return
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(
+                            update(Job)
+                            .where(Job.id == job_id, Job.status == "running")
+                            .values(heartbeat_at=time.time())
+                        )
+                except Exception:
+                    # база недоступна — попробуем на следующем такте
+                    pass
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def finish_job(job_id: str, attempt: int, **values) -> bool:
+    """
+    Записывает итог задания, если оно всё ещё за этим воркером (running, та же
+    попытка). Возвращает False, если задание уже забрал requeue_stale.
+    """
+    updated = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == "running", Job.attempts == attempt)
+        .values(finished_at=time.time(), **values)
+    )
+    db.session.commit()
+    return updated.rowcount > 0
+
+
+def run_job(job: Job) -> None:
+    """
+    Выполняет задание и сохраняет результат или ошибку.
+
+    Если результат не удаётся сохранить (ошибка базы, обрыв соединения,
+    несериализуемый результат), задание помечается failed с этой ошибкой;
+    если недоступна и сама база, его вернёт в очередь requeue_stale.
+    Результат задания, которое за это время забрал requeue_stale, отбрасывается.
+    """
+    job_id, attempt, kind, payload = job.id, job.attempts, job.kind, job.payload
+    with heartbeat(job_id, deadline=job.started_at + JOB_MAX_RUNTIME):
+        try:
+            values = {"result": HANDLERS[kind](payload), "status": "done"}
+        except Exception as e:
+            db.session.rollback()
+            values = {"error": f"{type(e).__name__}: {e}", "status": "failed"}
+    try:
+        finish_job(job_id, attempt, **values)
+    except Exception as e:
+        db.session.rollback()
+        error = f"Не удалось сохранить результат: {type(e).__name__}: {str(e).splitlines()[0]}"
+        try:
+            finish_job(job_id, attempt, status="failed", result=None, error=error)
+        except Exception:
+            db.session.rollback()
+
+
+def requeue_stale() -> int:
+    """
+    Возвращает в очередь задания, аренда которых не продлевалась дольше
+    JOB_LEASE (воркер упал, завис или задание превысило JOB_MAX_RUNTIME).
+    """
+    now = time.time()
+    stale = Job.query.filter(Job.status == "running", Job.heartbeat_at < now - JOB_LEASE).all()
+    for job in stale:
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            job.status = "failed"
+            if job.started_at is not None and job.started_at < now - JOB_MAX_RUNTIME:
+                job.error = "Превышено время выполнения"
+            else:
+                job.error = "Воркер перестал отвечать"
+            job.finished_at = now
+        else:
+            job.status = "queued"
+            job.started_at = None
+            job.heartbeat_at = None
+    db.session.commit()
+    return len(stale)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+def stats() -> Dict[str, Any]:
+    """Глубина очереди и времена ожидания/выполнения последних заданий."""
+    db.session.expire_all()
+    counts = dict(db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all())
+    oldest = db.session.query(db.func.min(Job.created_at)).filter(Job.status == "queued").scalar()
+    recent = (
+        Job.query.filter(Job.finished_at.isnot(None))
+        .order_by(Job.finished_at.desc())
+        .limit(STATS_WINDOW)
+        .all()
+    )
+    waits = [j.started_at - j.created_at for j in recent]
+    runs = [j.finished_at - j.started_at for j in recent]
+    return {
+        "queued": counts.get("queued", 0),
+        "running": counts.get("running", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "oldest_queued_s": round(time.time() - oldest, 3) if oldest else 0.0,
+        "wait_p50_s": percentile(waits, 0.5),
+        "wait_p95_s": percentile(waits, 0.95),
+        "run_p50_s": percentile(runs, 0.5),
+        "run_p95_s": percentile(runs, 0.95),
+    }
+
+
+def work(app, stop: Callable[[], bool] = lambda: False, poll: float = 0.5) -> None:
+    """
+    Цикл воркера: забирает и выполняет задания, пока `stop()` не вернёт True.
+    Когда очередь пуста, ждёт `poll` секунд.
+    """
+    with app.app_context():
+        last_check = None
+        while not stop():
+            try:
+                if last_check is None or time.monotonic() - last_check > JOB_LEASE / 2:
+                    requeue_stale()
+                    last_check = time.monotonic()
+                job = claim_next()
+                if job is None:
+                    time.sleep(poll)
+                    continue
+                run_job(job)
+            except Exception:
+                # обрыв соединения с базой и т.п.: цикл воркера продолжается
+                db.session.rollback()
+                time.sleep(poll)
+            finally:
+                db.session.remove()
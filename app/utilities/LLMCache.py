@@ -0,0 +1,184 @@
+'''
+Кеш ответов языковых моделей по ключу (модель, промпт, температура).
+
+Два уровня: словарь в памяти процесса (LRU, попадание — микросекунды) и
+файл SQLite, который переживает перезапуск и общий для воркеров на одной
+машине. Записи живут `ttl` секунд; при превышении `max_entries` удаляются
+давно не использованные.
+
+Ответы с высокой температурой не кешируются: там разброс ответов — часть
+замысла (кандидаты ансамбля), и повтор одного ответа его бы обесценил.
+'''
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.dirname(__file__), "..", "llm_cache.sqlite3"))
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+# Выше этой температуры ответы не кешируются
+CACHE_MAX_TEMP = float(os.getenv("LLM_CACHE_MAX_TEMP", "0.5"))
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+
+def cache_key(model: str, prompt: str, temp: float) -> str:
+    """Ключ записи: SHA-256 от модели, температуры и текста промпта."""
+    raw = f"{model}\x00{float(temp):.3f}\x00{prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Двухуровневый кеш ответов (память + SQLite) с TTL и ограничением размера.
+
+    Args:
+        path (str | None): Путь к файлу SQLite; None — только память.
+        ttl (float): Время жизни записи в секундах.
+        max_entries (int): Предел числа записей в SQLite.
+        memory_entries (int): Предел числа записей в памяти.
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, ttl: float = CACHE_TTL,
+                 max_entries: int = CACHE_MAX_ENTRIES, memory_entries: int = CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        if path is not None:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " model TEXT NOT NULL,"
+                    " response TEXT NOT NULL,"
+                    " created REAL NOT NULL,"
+                    " used REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_used ON llm_cache (used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Соединение SQLite нельзя делить между потоками — у каждого потока своё
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Возвращает ответ по ключу или None (нет записи или истёк TTL)."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, created = entry
+                if now - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    return response
+                del self._memory[key]
+
+        if self.path is None:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, created FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                response, created = row
+                if now - created >= self.ttl:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE llm_cache SET used = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            # кеш — оптимизация: ошибка базы не должна ломать запрос к модели
+            return None
+        self._remember(key, response, created)
+        return response
+
+    def set(self, key: str, model: str, response: str) -> None:
+        """Сохраняет ответ модели в обоих уровнях кеша."""
+        now = time.time()
+        self._remember(key, response, now)
+        if self.path is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, model, response, created, used) VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now),
+                )
+                self._writes += 1
+                # Чистка не на каждую запись: удаляем просроченные и самые старые сверх предела
+                if self._writes % 100 == 1:
+                    conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,))
+                    conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN ("
+                        " SELECT key FROM llm_cache ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+        except sqlite3.Error:
+            pass
+
+    def _remember(self, key: str, response: str, created: float) -> None:
+        with self._lock:
+            self._memory[key] = (response, created)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Полностью очищает кеш."""
+        with self._lock:
+            self._memory.clear()
+        if self.path is not None:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM llm_cache")
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Возвращает общий кеш процесса, создавая его при первом обращении."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = ResponseCache()
+                except sqlite3.Error:
+                    # файл недоступен (например, только для чтения) — кеш только в памяти
+                    _cache = ResponseCache(path=None)
+    return _cache
+
+
+def cached_call(model: str, prompt: str, temp: float, fetch: Callable[[], str]) -> str:
+    """
+    Возвращает ответ модели из кеша или вызывает `fetch` и кеширует результат.
+
+    Ошибки ("Error: ...") и ответы с температурой выше CACHE_MAX_TEMP не кешируются.
+    """
+    if not CACHE_ENABLED or temp > CACHE_MAX_TEMP:
+        return fetch()
+    cache = get_cache()
+    key = cache_key(model, prompt, temp)
+    response = cache.get(key)
+    if response is not None:
+        return response
+    response = fetch()
+    if isinstance(response, str) and not response.startswith("Error"):
+        cache.set(key, model, response)
+    return response
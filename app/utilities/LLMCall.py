@@ -1,6 +1,110 @@
-import openai
 import os
+import base64
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
+from utilities import LLMCache
+from utilities.LLMCache import cache_key, cached_call, get_cache
+from utilities.Resolution import parse_formula, canonical_form
+
+load_dotenv()
+
+YANDEX_BASE_URL = os.getenv("YANDEX_CLOUD_BASE_URL", "https://rest-assistant.api.cloud.yandex.net/v1")
+YANDEX_MODEL = "yandexgpt/rc"
+GEMMA_MODEL = "gemma-3-27b-it/latest"
+GIGA_MODEL = "GigaChat-2"
+
+# Потоковый режим: ответ читается по мере генерации и обрывается после первой полной формулы
+STREAM_RESPONSES = os.getenv("LLM_STREAM", "1") != "0"
+
+# Сколько секунд ждать каждого кандидата в ансамбле (после — синтез без него)
+BACKEND_TIMEOUTS = {
+    "yandex": float(os.getenv("LLM_TIMEOUT_YANDEX", "30")),
+    "gemma": float(os.getenv("LLM_TIMEOUT_GEMMA", "30")),
+    "giga": float(os.getenv("LLM_TIMEOUT_GIGA", "30")),
+}
+NO_ANSWER = "(no answer)"
+
+# Общий пул потоков для параллельных запросов к моделям
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_MAX_WORKERS", "12")), thread_name_prefix="llm")
+# Отдельный пул для пакетного ансамбля: его задачи сами ждут задачи из _executor,
+# поэтому в общем пуле они могли бы занять все потоки и заблокироваться
+_batch_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_BATCH_PARALLEL", "4")), thread_name_prefix="llm-batch")
+
+# Пул HTTP-соединений с keep-alive: TLS-рукопожатие не повторяется на каждый запрос
+HTTP_LIMITS = dict(
+    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+    max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+    keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+)
+
+def _create_yandex_client():
+    # openai и httpx импортируются только при создании клиента:
+    # страницам без LLM они не нужны
+    import httpx
+    import openai
+
+    # Один клиент обслуживает и YandexGPT, и Gemma (общий endpoint и ключ)
+    return openai.OpenAI(
+        api_key=os.getenv("YANDEX_CLOUD_API_KEY"),
+        base_url=YANDEX_BASE_URL,
+        project=os.getenv("YANDEX_CLOUD_FOLDER"),
+        timeout=max(BACKEND_TIMEOUTS["yandex"], BACKEND_TIMEOUTS["gemma"]),
+        http_client=openai.DefaultHttpxClient(limits=httpx.Limits(**HTTP_LIMITS)),
+    )
+
+def _create_giga_client():
+    from gigachat import GigaChat
+
+    credentials = f"{os.getenv('GIGA_CLIENT_ID')}:{os.getenv('GIGA_CLIENT_SECRET')}"
+    base64_credentials = base64.b64encode(credentials.encode()).decode()
+    # Клиент хранит токен доступа и обновляет его только по истечении срока
+    return GigaChat(
+        credentials=base64_credentials,
+        model=GIGA_MODEL,
+        verify_ssl_certs=False,
+        timeout=BACKEND_TIMEOUTS["giga"],
+        max_connections=HTTP_LIMITS["max_connections"],
+    )
+
+# Реестр бэкендов: имя -> фабрика долгоживущего клиента
+BACKENDS = {
+    "yandex": _create_yandex_client,
+    "giga": _create_giga_client,
+}
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(name):
+    """Возвращает клиент бэкенда из реестра, создавая его при первом обращении."""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = BACKENDS[name]()
+                _clients[name] = client
+    return client
+
+def register_backend(name, factory):
+    """
+    Подключает (или заменяет) бэкенд: `factory()` создаёт его клиент.
+    Уже созданный клиент с этим именем сбрасывается.
+    """
+    with _clients_lock:
+        BACKENDS[name] = factory
+        _clients.pop(name, None)
+
+def _reset_clients():
+    _clients.clear()
+
+# Соединения нельзя разделять между процессами: после fork клиенты создаются заново
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients)
 
 def to_promt_1(sentence):
     return f"""
@@ -65,26 +169,270 @@ def to_promt_2(sentence, var_1, var_2, var_3):
         Output Format:
         ONLY the final, synthesized FOL formula. No explanations, no commentary.
             """
-def call_yandex_neuro(sentence, to_promt, temp = 0.3):
-    load_dotenv()
-    YANDEX_CLOUD_FOLDER=os.getenv("YANDEX_CLOUD_FOLDER")
-    YANDEX_CLOUD_API_KEY = os.getenv("YANDEX_CLOUD_API_KEY")
-    YANDEX_CLOUD_MODEL = "yandexgpt/rc"
-    if(type(sentence) == list):
-        prompt = to_promt(sentence[0], sentence[1], sentence[2], sentence[3])
-    else:
-        prompt = to_promt(sentence)
+class TokenBucket:
+    """
+    Ограничитель частоты запросов (token bucket).
+
+    Пополняется со скоростью `rate` токенов в секунду, но хранит не больше
+    `capacity`. Каждый запрос забирает один токен; если токенов нет, ждёт.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
 
+    def _take(self):
+        """Забирает токен и возвращает 0 или сколько секунд ждать следующего."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
 
-    client = openai.OpenAI(
-        api_key=YANDEX_CLOUD_API_KEY,
-        base_url="https://rest-assistant.api.cloud.yandex.net/v1",
-        project=YANDEX_CLOUD_FOLDER
+    def acquire(self, timeout=None):
+        """Забирает токен; возвращает False, если не дождались за `timeout` секунд."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+RATE_STATE_PATH = os.getenv(
+    "LLM_RATE_STATE_PATH", os.path.join(os.path.dirname(__file__), "..", "llm_rate.sqlite3")
+)
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket, общий для всех процессов приложения.
+
+    Лимит провайдера действует на всех клиентов сразу, а процессов много
+    (воркеры gunicorn и worker.py), поэтому токены и время пополнения хранятся
+    строкой в SQLite (как кеш LLMCache) и меняются в транзакции BEGIN IMMEDIATE.
+    Процессы в разных контейнерах должны видеть один файл (общий том, см.
+    docker-compose.yml). Если файл недоступен, лимит действует в пределах процесса.
+    """
+
+    def __init__(self, name, rate, capacity, path=RATE_STATE_PATH):
+        super().__init__(rate, capacity)
+        self.name = name
+        self.path = path
+        self._local = threading.local()
+        if path is not None:
+            try:
+                self._connect().execute(
+                    "CREATE TABLE IF NOT EXISTS rate_limit ("
+                    " name TEXT PRIMARY KEY,"
+                    " tokens REAL NOT NULL,"
+                    " updated REAL NOT NULL)"
+                )
+            except sqlite3.Error:
+                self.path = None
+
+    def _connect(self):
+        # Соединение SQLite нельзя делить между потоками и процессами
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _take(self):
+        if self.path is None:
+            return super()._take()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated FROM rate_limit WHERE name = ?", (self.name,)).fetchone()
+                now = time.time()
+                tokens = self.capacity if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, now),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            # общее состояние недоступно — ограничиваем хотя бы этот процесс
+            return super()._take()
+        return wait
+
+# Лимиты провайдеров (на все процессы вместе): YandexGPT и Gemma делят квоту одного облачного каталога
+RATE_LIMITERS = {
+    "yandex": SharedTokenBucket("yandex", float(os.getenv("LLM_RATE_YANDEX", "2")), float(os.getenv("LLM_BURST_YANDEX", "3"))),
+    "giga": SharedTokenBucket("giga", float(os.getenv("LLM_RATE_GIGA", "1")), float(os.getenv("LLM_BURST_GIGA", "2"))),
+}
+
+class BackendHealth:
+    """
+    Состояние бэкенда: задержки последних запросов и предохранитель (circuit breaker).
+
+    После `failure_threshold` ошибок подряд бэкенд отключается на `cooldown`
+    секунд; затем пропускается один пробный запрос — при успехе бэкенд снова
+    считается здоровым, при ошибке отключается ещё раз.
+    """
+
+    def __init__(self, window=100, failure_threshold=3, cooldown=30.0):
+        self.latencies = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Можно ли отправить запрос (предохранитель не разомкнут)."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.cooldown:
+                return False
+            # пробный запрос; следующий — не раньше чем через cooldown
+            self.opened_at = now
+            return True
+
+    def record(self, latency, ok):
+        with self.lock:
+            if ok:
+                self.latencies.append(latency)
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self.opened_at = time.monotonic()
+
+    def percentile(self, q):
+        """Перцентиль задержки (0 < q < 1) или None, пока замеров мало."""
+        with self.lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def track(self, fetch):
+        """Выполняет запрос, замеряя время и учитывая ошибку."""
+        started = time.monotonic()
+        try:
+            result = fetch()
+        except Exception:
+            self.record(time.monotonic() - started, False)
+            raise
+        self.record(time.monotonic() - started, not is_error(result))
+        return result
+
+def is_error(answer):
+    return not isinstance(answer, str) or answer.startswith("Error")
+
+# Дублирующий (hedged) запрос отправляется, если ответа нет дольше этого перцентиля задержки
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+HEALTH = {
+    name: BackendHealth(
+        failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "3")),
+        cooldown=float(os.getenv("LLM_BREAKER_COOLDOWN", "30")),
     )
+    for name in ("yandex", "gemma", "giga")
+}
+MODEL_BACKENDS = {YANDEX_MODEL: "yandex", GEMMA_MODEL: "gemma"}
+
+def _yandex_model_uri(model):
+    return f"gpt://{os.getenv('YANDEX_CLOUD_FOLDER')}/{model}"
+
+# Ответ при отказе локального ограничителя частоты (запрос к провайдеру не отправлялся)
+RATE_LIMITED = "Error: rate limit"
+
+def _call_backend(backend, limiter, fetch):
+    """
+    Берёт токен ограничителя `limiter` и выполняет запрос с замером в HEALTH[backend].
+
+    Токен берётся до замера: ожидание в очереди ограничителя не считается
+    задержкой провайдера, а локальный отказ — его ошибкой (иначе всплеск
+    запросов размыкал бы предохранитель здорового бэкенда).
+    """
+    if not RATE_LIMITERS[limiter].acquire(timeout=BACKEND_TIMEOUTS[backend]):
+        return RATE_LIMITED
+    return HEALTH[backend].track(fetch)
+
+def _responses_create(model, prompt, temp):
+    # Повторные промпты с низкой температурой отдаются из кеша без запроса к API
+    backend = MODEL_BACKENDS[model]
+    return cached_call(model, prompt, temp, lambda: _call_backend(backend, "yandex", lambda: _fetch_response(model, prompt, temp)))
+
+# Символы, с которых может продолжаться формула (после них обрывать поток нельзя)
+CONTINUATION = set("∧∨→↔&|-<=(),")
+
+def extract_formula(text):
+    """
+    Возвращает первую строку ответа, которую разбирает parse_formula, или None.
+
+    Строка должна содержать хотя бы один предикат с аргументами: иначе
+    служебные слова вроде "Answer:" тоже разобрались бы как атомы.
+    """
+    for line in text.splitlines():
+        candidate = line.strip().strip("`").strip().rstrip(".")
+        if "(" not in candidate:
+            continue
+        try:
+            parse_formula(candidate)
+        except Exception:
+            continue
+        return candidate
+    return None
 
+def _stream_response(client, model, prompt, temp):
+    """
+    Читает ответ потоком и закрывает его, как только получена полная формула.
+
+    Формула считается законченной на границе токенов: следующий фрагмент
+    начинается с пробела или переноса строки и не продолжает её связкой.
+    """
+    text = ""
+    with client.responses.create(
+        model=_yandex_model_uri(model),
+        temperature=temp,
+        input=prompt,
+        max_output_tokens=500,
+        stream=True,
+    ) as stream:
+        for event in stream:
+            if event.type != "response.output_text.delta":
+                continue
+            delta = event.delta
+            if delta[:1].isspace() and delta.strip()[:1] not in CONTINUATION:
+                formula = extract_formula(text)
+                if formula is not None:
+                    return formula
+            text += delta
+    return extract_formula(text) or text
+
+def _fetch_response(model, prompt, temp):
     try:
+        client = get_client("yandex")
+        if STREAM_RESPONSES:
+            return _stream_response(client, model, prompt, temp)
         response = client.responses.create(
-            model=f"gpt://{YANDEX_CLOUD_FOLDER}/{YANDEX_CLOUD_MODEL}",
+            model=_yandex_model_uri(model),
             temperature=temp,
             input=prompt,
             max_output_tokens=500
@@ -98,55 +446,195 @@ def call_yandex_neuro(sentence, to_promt, temp = 0.3):
             return ("Available attributes:", [attr for attr in dir(response) if not attr.startswith('_')])
     except Exception as e:
         return (f"Error: {e}")
+
+def call_yandex_neuro(sentence, to_promt, temp = 0.3):
+    if(type(sentence) == list):
+        prompt = to_promt(sentence[0], sentence[1], sentence[2], sentence[3])
+    else:
+        prompt = to_promt(sentence)
+    return _responses_create(YANDEX_MODEL, prompt, temp)
+
 def call_gemma(sentence, to_promt, temp = 0.3):
-    load_dotenv()
-    YANDEX_CLOUD_FOLDER=os.getenv("YANDEX_CLOUD_FOLDER")
-    YANDEX_CLOUD_API_KEY = os.getenv("YANDEX_CLOUD_API_KEY")
-    YANDEX_CLOUD_MODEL = "gemma-3-27b-it/latest"
     prompt = to_promt(sentence)
-    client = openai.OpenAI(
-        api_key=YANDEX_CLOUD_API_KEY,
-        base_url="https://rest-assistant.api.cloud.yandex.net/v1",
-        project=YANDEX_CLOUD_FOLDER
-    )
+    return _responses_create(GEMMA_MODEL, prompt, temp)
 
-    try:
-        response = client.responses.create(
-            model=f"gpt://{YANDEX_CLOUD_FOLDER}/{YANDEX_CLOUD_MODEL}",
-            temperature=temp,
-            input=prompt,
-            max_output_tokens=500
-        )
-
-        if hasattr(response, 'output') and hasattr(response.output, 'text'):
-            return (response.output.text)
-        elif hasattr(response, 'output_text'):
-            return (response.output_text)
-        else:
-            return ("Available attributes:", [attr for attr in dir(response) if not attr.startswith('_')])
-    except Exception as e:
-        return (f"Error: {e}") 
 def call_giga(sentence, to_promt, temp = 0.0):
-    load_dotenv()
     prompt = to_promt(sentence)
-    client_id = os.getenv("GIGA_CLIENT_ID")
-    client_secret = os.getenv("GIGA_CLIENT_SECRET")
-    from gigachat import GigaChat
-    import base64
+    return cached_call(GIGA_MODEL, prompt, temp, lambda: _call_backend("giga", "giga", lambda: _fetch_giga(prompt, temp)))
 
-    credentials = f"{client_id}:{client_secret}"
-    base64_credentials = base64.b64encode(credentials.encode()).decode()
-    from gigachat import GigaChat
-    if(temp == 0):
-        giga = GigaChat(credentials=f'{base64_credentials}', model='GigaChat-2', verify_ssl_certs=False)
-    else:
-        giga = GigaChat(credentials=f'{base64_credentials}', model='GigaChat-2',temperature=temp, verify_ssl_certs=False)
-    response = giga.chat(prompt)
-    return(response.choices[0].message.content)
-
-def ensemble(sentence):
-    var_1  = call_yandex_neuro(sentence, to_promt_1, 1.2)
-    var_2 = call_gemma(sentence,to_promt_1, 1.2)
-    var_3 = call_giga(sentence,to_promt_1, 1.2)
+def _fetch_giga(prompt, temp):
+    try:
+        giga = get_client("giga")
+        # Клиент общий, поэтому температура передаётся в запросе, а не в конструкторе
+        payload = {"messages": [{"role": "user", "content": prompt}]}
+        if(temp != 0):
+            payload["temperature"] = temp
+        response = giga.chat(payload)
+        return(response.choices[0].message.content)
+    except Exception as e:
+        return (f"Error: {e}")
+
+# Бэкенды-кандидаты ансамбля: имя -> функция вызова
+CANDIDATES = {
+    "yandex": call_yandex_neuro,
+    "gemma": call_gemma,
+    "giga": call_giga,
+}
+
+def ensemble_candidates(sentence, temp=None, timeouts=None):
+    """
+    Запрашивает ответы кандидатов параллельно; каждого ждёт не дольше его таймаута.
+
+    temp=None — у каждого бэкенда своя температура по умолчанию. Бэкенды с
+    разомкнутым предохранителем пропускаются сразу. Если ответа нет дольше
+    HEDGE_PERCENTILE обычной задержки бэкенда, отправляется дублирующий запрос
+    и берётся первый успешный ответ.
+    """
+    timeouts = {**BACKEND_TIMEOUTS, **(timeouts or {})}
+    extra = () if temp is None else (temp,)
+    started = time.monotonic()
+    answers = {}
+    pending = {}
+    hedge_at = {}
+
+    def submit(name):
+        pending[_executor.submit(CANDIDATES[name], sentence, to_promt_1, *extra)] = name
+
+    for name in CANDIDATES:
+        if not HEALTH[name].allow():
+            answers[name] = NO_ANSWER
+            continue
+        submit(name)
+        delay = HEALTH[name].percentile(HEDGE_PERCENTILE)
+        if delay is not None and delay < timeouts[name]:
+            hedge_at[name] = started + delay
+
+    while pending:
+        now = time.monotonic()
+        for name, at in list(hedge_at.items()):
+            if at <= now:
+                del hedge_at[name]
+                submit(name)
+        # бэкенды, не уложившиеся в таймаут, пропускаются
+        for future, name in list(pending.items()):
+            if now >= started + timeouts[name]:
+                future.cancel()
+                del pending[future]
+                hedge_at.pop(name, None)
+                answers.setdefault(name, NO_ANSWER)
+        if not pending:
+            break
+
+        deadline = min([started + timeouts[name] for name in pending.values()] + list(hedge_at.values()))
+        done, _ = wait(list(pending), timeout=max(0.0, deadline - now), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            try:
+                answer = future.result()
+            except Exception as e:
+                answer = f"Error: {e}"
+            # при ошибке ждём дублирующий запрос, если он ещё выполняется
+            if is_error(answer) and name in pending.values():
+                continue
+            answers[name] = answer
+            hedge_at.pop(name, None)
+            for other, other_name in list(pending.items()):
+                if other_name == name:
+                    other.cancel()
+                    del pending[other]
+    return {name: answers.get(name, NO_ANSWER) for name in CANDIDATES}
+
+# Сколько кандидатов должны совпасть, чтобы обойтись без синтеза
+AGREEMENT_MIN = int(os.getenv("LLM_AGREEMENT_MIN", "3"))
+
+def parse_candidates(answers):
+    """
+    Оставляет только разбираемые ответы кандидатов.
+
+    Returns:
+        dict: имя бэкенда -> (строка формулы, каноническая форма).
+    """
+    parsed = {}
+    for name in CANDIDATES:
+        answer = answers.get(name, NO_ANSWER)
+        if is_error(answer) or answer == NO_ANSWER:
+            continue
+        formula = extract_formula(answer)
+        if formula is None:
+            continue
+        parsed[name] = (formula, canonical_form(parse_formula(formula)))
+    return parsed
+
+def synthesize(sentence, answers):
+    """
+    Итоговая формула из ответов кандидатов (тех, что успели прийти).
+
+    Ошибки и неразбираемые ответы в промпт синтеза не попадают. Если не
+    меньше AGREEMENT_MIN кандидатов дали одну формулу (с точностью до имён
+    переменных и регистра предикатов) и остальные с ними не спорят,
+    синтез не нужен — возвращается она.
+    """
+    parsed = parse_candidates(answers)
+    forms = [canonical for _, canonical in parsed.values()]
+    if len(forms) >= AGREEMENT_MIN and all(f == forms[0] for f in forms):
+        return next(iter(parsed.values()))[0]
+
+    var_1, var_2, var_3 = (parsed[name][0] if name in parsed else NO_ANSWER for name in CANDIDATES)
     final = call_yandex_neuro([sentence, var_1, var_2, var_3],to_promt_2, 0.2)
-    return final
\ No newline at end of file
+    return final
+
+# Ключ итогового ответа ансамбля в кеше: модели кандидатов и версия промптов
+# (хеш шаблонов — любая правка to_promt_1/to_promt_2 сбрасывает записи)
+ENSEMBLE_PROMPT_VERSION = hashlib.sha256(
+    (to_promt_1("{sentence}") + to_promt_2("{sentence}", "{1}", "{2}", "{3}")).encode("utf-8")
+).hexdigest()[:12]
+
+def ensemble_cache_model():
+    models = {"yandex": YANDEX_MODEL, "gemma": GEMMA_MODEL, "giga": GIGA_MODEL}
+    backends = ",".join(f"{name}={models.get(name, name)}" for name in CANDIDATES)
+    return f"ensemble:{backends}:{ENSEMBLE_PROMPT_VERSION}"
+
+def ensemble(sentence, timeouts=None):
+    """
+    Итоговая формула ансамбля для предложения.
+
+    Кандидаты спрашиваются с температурой 1.2 и потому не кешируются, а промпт
+    синтеза содержит их случайные ответы — его ключ почти не повторяется.
+    Поэтому кешируется сам итог: по предложению, набору моделей и версии
+    промптов. Итог, собранный не из всех кандидатов (таймаут, ошибка,
+    разомкнутый предохранитель), не кешируется.
+    """
+    if not LLMCache.CACHE_ENABLED:
+        return synthesize(sentence, ensemble_candidates(sentence, 1.2, timeouts))
+    model = ensemble_cache_model()
+    cache = get_cache()
+    key = cache_key(model, sentence, 0)
+    final = cache.get(key)
+    if final is not None:
+        return final
+    answers = ensemble_candidates(sentence, 1.2, timeouts)
+    final = synthesize(sentence, answers)
+    complete = all(not is_error(a) and a != NO_ANSWER for a in answers.values())
+    if complete and not is_error(final):
+        cache.set(key, model, final)
+    return final
+
+def ensemble_batch(sentences, timeouts=None):
+    """
+    Ансамбль для нескольких предложений сразу.
+
+    Предложения обрабатываются параллельно (не больше LLM_BATCH_PARALLEL
+    одновременно), повторы запрашиваются один раз. Ответы возвращаются в
+    порядке входного списка; при ошибке на месте ответа — пустая строка.
+    """
+    futures = {}
+    for sentence in sentences:
+        if sentence not in futures:
+            futures[sentence] = _batch_executor.submit(ensemble, sentence, timeouts)
+    results = []
+    for sentence in sentences:
+        try:
+            results.append(futures[sentence].result())
+        except Exception:
+            results.append("")
+    return results
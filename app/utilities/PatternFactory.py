@@ -1,12 +1,69 @@
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 from utilities.patterns import PATTERNS
+from utilities.patterns.features import get_features, PREP
+
+# Предел размера таблицы диспетчеризации (число различных сигнатур)
+MAX_SIGNATURES = 4096
 
 
 class PatternFactory:
+    """
+    Выбирает паттерн для документа по сигнатуре зависимостей корня.
+
+    Сигнатура — множество меток зависимостей детей корня (с леммой для
+    предлогов: 'prep:to'). Она вычисляется один раз на документ по массивам
+    признаков (doc.to_array, см. patterns.features), а список
+    паттернов-кандидатов для каждой сигнатуры кешируется в таблице. `match`
+    вызывается по очереди для кандидатов этой сигнатуры (в порядке приоритета),
+    пока один не подойдёт; паттерны, не допускающие сигнатуру, не проверяются.
+    """
+
     def __init__(self):
         self.patterns = PATTERNS
+        self._table: Dict[FrozenSet[str], Tuple[Any, ...]] = {}
+
+    @staticmethod
+    def compute_signature(doc: Any) -> Optional[FrozenSet[str]]:
+        """
+        Строит сигнатуру документа: метки зависимостей детей корня.
+
+        Args:
+            doc: Обработанный документ или спан (обычно spacy.tokens.Doc).
+
+        Returns:
+            Optional[FrozenSet[str]]: Сигнатура или None, если корень не найден.
+        """
+        features = get_features(doc)
+        start = getattr(doc, "start", 0)
+        root = features.find_root(start, start + len(doc))
+        if root is None:
+            return None
+
+        dep, lemma = features.dep_ids, features.lemma_ids
+        signature = set()
+        for child in features.children[root]:
+            signature.add(features.text(dep[child]))
+            if dep[child] == PREP:
+                signature.add(f"prep:{features.lemma_text(lemma[child]).lower()}")
+        return frozenset(signature)
+
+    def candidates(self, signature: FrozenSet[str]) -> Tuple[Any, ...]:
+        """
+        Возвращает паттерны, допускающие данную сигнатуру (в порядке приоритета).
+        """
+        found = self._table.get(signature)
+        if found is None:
+            if len(self._table) >= MAX_SIGNATURES:
+                self._table.clear()
+            found = tuple(p for p in self.patterns if p.accepts_signature(signature))
+            self._table[signature] = found
+        return found
 
     def get_pattern(self, doc):
-        for pattern in self.patterns:
+        signature = self.compute_signature(doc)
+        if signature is None:
+            return None
+        for pattern in self.candidates(signature):
             if pattern.match(doc):
                 return pattern
         return None
@@ -2,9 +2,9 @@
 # Добавлена поддержка подстановок и сколемизации по алгоритму:
 # читаем префикс слева-направо, для ∃: если перед ним нет ∀ -> константа, иначе -> функция от предшествующих ∀.
 from dataclasses import dataclass
-from typing import List, Tuple, Set, Dict, Optional, Union
+from typing import Iterator, List, Tuple, Set, Dict, Optional, Union
 import itertools
-from typing import Any
+from typing import Any, Callable
 
 
 class Formula:
@@ -393,6 +393,14 @@ from typing import List, Optional
 # Парсер формул
 # ------------------------------
 
+# Классы токенов формулы (общие для парсера и подсветки формул в шаблонах)
+# Специальные символы и операторы (добавили точку)
+SPECIAL_TOKEN = r'[∀∃∧∨¬→↔(),.]'
+# Идентификаторы (переменные, предикаты, функции)
+IDENTIFIER_TOKEN = r'[a-zA-Z_][a-zA-Z0-9_]*'
+TOKEN_RE = re.compile(f'{SPECIAL_TOKEN}|{IDENTIFIER_TOKEN}')
+
+
 class Parser:
     def __init__(self, text: str):
         self.tokens = self.tokenize(text)
@@ -400,13 +408,7 @@ class Parser:
 
     def tokenize(self, text: str) -> List[str]:
         """Разбивает строку на токены"""
-        # Специальные символы и операторы (добавили точку)
-        special = r'[∀∃∧∨¬→↔(),.]'
-        # Идентификаторы (переменные, предикаты, функции)
-        identifier = r'[a-zA-Z_][a-zA-Z0-9_]*'
-
-        pattern = f'{special}|{identifier}'
-        tokens = re.findall(pattern, text)
+        tokens = TOKEN_RE.findall(text)
         return [t for t in tokens if t.strip()]
 
     def current_token(self) -> Optional[str]:
@@ -571,6 +573,31 @@ def parse_formula(text: str) -> Formula:
     """Парсит строку в формулу"""
     return Parser(text).parse()
 
+def canonical_form(formula: Formula) -> Formula:
+    """
+    Каноническая форма для сравнения формул с точностью до переименования:
+    связанные переменные заменяются на v1, v2, ... в порядке появления кванторов,
+    имена предикатов приводятся к нижнему регистру.
+    """
+    counter = itertools.count(1)
+
+    def canon_term(t: Term, mapping: Dict[str, str]) -> Term:
+        if not t.args:
+            return Term(mapping.get(t.name, t.name))
+        return Term(t.name, tuple(canon_term(a, mapping) for a in t.args))
+
+    def canon(f: Formula, mapping: Dict[str, str]) -> Formula:
+        if isinstance(f, Atom):
+            return Atom(f.name.lower(), tuple(canon_term(a, mapping) for a in f.args))
+        if isinstance(f, Not):
+            return Not(canon(f.f, mapping))
+        if isinstance(f, (ForAll, Exists)):
+            new = f"v{next(counter)}"
+            return type(f)(new, canon(f.body, {**mapping, f.var: new}))
+        return type(f)(canon(f.left, mapping), canon(f.right, mapping))
+
+    return canon(formula, {})
+
 # ------------------------------
 # Алгоритм унификации
 # ------------------------------
@@ -812,27 +839,90 @@ def formula_to_clauses(formula: Formula) -> List[List[Literal]]:
 # Основная логика: run_resolution
 # =========================================================
 
-def run_resolution(premises: List[str], goal: str) -> Tuple[str, List[Dict[str, Any]]]:
+def run_resolution(premises: List[Union[str, Formula]], goal: Union[str, Formula]) -> Tuple[str, List[Dict[str, Any]]]:
     """
     Главная функция для интерфейса.
-    Принимает список посылок и цель (строки).
+    Принимает список посылок и цель (строки или готовые объекты Formula —
+    например, построенные паттернами; такие не разбираются повторно).
     Возвращает ("ENTAILS" / "NOT ENTAILS", список_шагов).
     """
+    result, _, steps_data = find_proof(premises, goal, keep_trace=True)
+    return result, steps_data
+
+
+def find_proof(premises: List[Union[str, Formula]], goal: Union[str, Formula],
+               keep_trace: bool = False) -> Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Резолюция с извлечением доказательства.
+
+    Возвращает (итог, доказательство, полная_трасса). Доказательство — только
+    дизъюнкты, из которых выведен пустой (см. extract_proof); пусто, если
+    противоречие не найдено. Без keep_trace полная трасса не собирается
+    (возвращается пустой список) — шаги не создаются и не хранятся.
+    """
     steps_data = []
-    
-    def add_step(cid: int, clause_str: str, info: str, parents: List[int] = None, subst: str = ""):
-        steps_data.append({
+    result = "ERROR"
+    proof = []
+    for event in iter_resolution(premises, goal, keep_trace=keep_trace):
+        if event["type"] == "step":
+            steps_data.append(event["step"])
+        else:
+            result = event["result"]
+            proof = event.get("proof", [])
+    return result, proof, steps_data
+
+
+def proof_ids(last_id: int, parents_of: Callable[[int], List[int]]) -> Set[int]:
+    """Номер `last_id` и все его предки по ссылкам на родителей."""
+    needed: Set[int] = set()
+    stack = [last_id]
+    while stack:
+        step_id = stack.pop()
+        if step_id in needed:
+            continue
+        needed.add(step_id)
+        stack.extend(parents_of(step_id))
+    return needed
+
+
+def extract_proof(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Доказательство из полной трассы: пустой дизъюнкт и все шаги, из которых
+    он выведен (обход по `parents`), в исходном порядке. Если противоречие
+    не найдено — пустой список.
+    """
+    contradiction = next((s for s in reversed(steps) if s["info"] == "Contradiction"), None)
+    if contradiction is None:
+        return []
+    by_id = {step["id"]: step for step in steps}
+    needed = proof_ids(contradiction["id"], lambda i: by_id[i]["parents"] if i in by_id else [])
+    return [step for step in steps if step["id"] in needed]
+
+
+def iter_resolution(premises: List[Union[str, Formula]], goal: Union[str, Formula],
+                    keep_trace: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Резолюция в виде генератора событий — шаги отдаются по мере вывода.
+
+    Yields:
+        {"type": "step", "step": {...}} для каждого шага (как в run_resolution;
+        без keep_trace — не отдаются) и последним — {"type": "result",
+        "result": "ВЫВОДИТСЯ" / "НЕ ВЫВОДИТСЯ" / "ERROR"}. При "ВЫВОДИТСЯ"
+        в событии есть и "proof" — шаги доказательства (см. extract_proof).
+    """
+    def make_step(cid: int, clause_str: str, info: str, parents: List[int] = None, subst: str = ""):
+        return {"type": "step", "step": {
             "id": cid,
             "clause": clause_str,
             "info": info,
             "parents": parents or [],
             "substitution": subst
-        })
+        }}
 
     try:
         # 1. Парсинг
-        prem_formulas = [parse_formula(p) for p in premises]
-        goal_formula = parse_formula(goal)
+        prem_formulas = [p if isinstance(p, Formula) else parse_formula(p) for p in premises]
+        goal_formula = goal if isinstance(goal, Formula) else parse_formula(goal)
         
         # 2. Построение отрицания цели: (P1 & P2 & ...) & ¬Goal
         full_formula = Not(goal_formula)
@@ -850,22 +940,36 @@ def run_resolution(premises: List[str], goal: str) -> Tuple[str, List[Dict[str,
         clause_db = []
         seen_clauses = set()
 
-        def add_clause_to_db(lits: List[Literal], info: str, parents: List[int] = None, subst: str = "") -> int:
+        def add_clause_to_db(lits: List[Literal], info: str, parents: List[int] = None, subst: str = "") -> Optional[int]:
             lits_sorted = sorted(lits, key=str)
             s_rep = ", ".join(str(l) for l in lits_sorted)
             
             if s_rep in seen_clauses:
-                return -1 # Дубликат
+                return None # Дубликат
             
             cid = len(clause_db) + 1
-            clause_db.append({'id': cid, 'lits': lits_sorted, 'info': info, 'str': s_rep})
+            # Родители и подстановка хранятся для восстановления доказательства
+            clause_db.append({'id': cid, 'lits': lits_sorted, 'info': info, 'str': s_rep,
+                              'parents': parents or [], 'subst': subst})
             seen_clauses.add(s_rep)
             
-            add_step(cid, s_rep, info, parents, subst)
             return cid
 
+        def clause_step(cid: int) -> Dict[str, Any]:
+            c = clause_db[cid - 1]
+            return make_step(cid, c['str'], c['info'], c['parents'], c['subst'])
+
+        def proof_from_db(contradiction: Dict[str, Any]) -> List[Dict[str, Any]]:
+            # Обход только по предкам пустого дизъюнкта — полная трасса не нужна
+            needed = proof_ids(contradiction["id"], lambda i: contradiction["parents"] if i == contradiction["id"]
+                               else clause_db[i - 1]['parents'])
+            needed.discard(contradiction["id"])
+            return [clause_step(cid)["step"] for cid in sorted(needed)] + [contradiction]
+
         for c in clauses:
-            add_clause_to_db(c, "Initial")
+            cid = add_clause_to_db(c, "Initial")
+            if cid and keep_trace:
+                yield clause_step(cid)
 
         # 5. Цикл резолюции (Saturation)
         max_steps = 1000
@@ -889,24 +993,30 @@ def run_resolution(premises: List[str], goal: str) -> Tuple[str, List[Dict[str,
                     for res_lits, subst_str in resolvents:
                         if not res_lits:
                             # Пустой клоз
-                            add_step(len(clause_db)+1, "⊥ (Empty Clause)", "Contradiction", 
-                                     [clause_1_obj['id'], clause_2_obj['id']], subst_str)
-                            return "ВЫВОДИТСЯ", steps_data
+                            contradiction = make_step(len(clause_db)+1, "⊥ (Empty Clause)", "Contradiction", 
+                                                      [clause_1_obj['id'], clause_2_obj['id']], subst_str)
+                            if keep_trace:
+                                yield contradiction
+                            yield {"type": "result", "result": "ВЫВОДИТСЯ",
+                                   "proof": proof_from_db(contradiction["step"])}
+                            return
                         
-                        new_id = add_clause_to_db(res_lits, "Resolve", 
-                                                  [clause_1_obj['id'], clause_2_obj['id']], subst_str)
+                        cid = add_clause_to_db(res_lits, "Resolve", 
+                                               [clause_1_obj['id'], clause_2_obj['id']], subst_str)
                         
-                        if new_id != -1:
-                            new_clauses_indices.append(new_id - 1)
+                        if cid:
+                            new_clauses_indices.append(cid - 1)
+                            if keep_trace:
+                                yield clause_step(cid)
 
             if not new_clauses_indices:
                 break
 
-        return "НЕ ВЫВОДИТСЯ", steps_data
+        yield {"type": "result", "result": "НЕ ВЫВОДИТСЯ"}
 
     except Exception as e:
-        import traceback
-        return "ERROR", [{"id": 0, "clause": "Error", "info": str(e), "parents": [], "substitution": ""}]
+        yield make_step(0, "Error", str(e))
+        yield {"type": "result", "result": "ERROR"}
 
 
 def resolve_clauses(c1: List[Literal], c2: List[Literal]) -> List[Tuple[List[Literal], str]]:
@@ -0,0 +1,74 @@
+'''
+Замер времени запуска: импорт тяжёлых модулей и прогрев (модели, клиенты).
+
+Тяжёлые зависимости (spaCy, openai, deep_translator и т.д.) загружаются
+лениво, при первом обращении. `warm_up` загружает их заранее — например,
+в главном процессе gunicorn до fork — и записывает время каждого шага
+в TIMINGS; `report` выводит его таблицей.
+
+Отчёт для всего приложения:
+    python -m utilities.Startup
+'''
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Шаг запуска -> время в миллисекундах (в порядке выполнения)
+TIMINGS: Dict[str, float] = {}
+
+
+@contextmanager
+def timed(name: str):
+    """Записывает в TIMINGS время выполнения блока."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def import_timed(modules: Iterable[str]) -> None:
+    """
+    Импортирует модули по очереди, записывая время каждого как "import <имя>".
+    Время включает зависимости, ещё не импортированные предыдущими модулями;
+    уже загруженные модули пропускаются.
+    """
+    for name in modules:
+        if name in sys.modules:
+            continue
+        with timed(f"import {name}"):
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                # необязательная зависимость: шаг останется в отчёте с её временем
+                pass
+
+
+def warm_up(steps: List[Tuple[str, Callable[[], object]]]) -> Dict[str, float]:
+    """Выполняет шаги прогрева `(имя, функция)` с замером и возвращает TIMINGS."""
+    for name, step in steps:
+        with timed(name):
+            step()
+    return TIMINGS
+
+
+def report(timings: Dict[str, float] = None) -> str:
+    """Таблица шагов запуска, от самого долгого к самому быстрому."""
+    timings = TIMINGS if timings is None else timings
+    if not timings:
+        return "Нет данных о запуске"
+    width = max(len(name) for name in timings)
+    lines = [f"{name:<{width}}  {ms:>9.1f} ms" for name, ms in sorted(timings.items(), key=lambda i: -i[1])]
+    lines.append(f"{'всего':<{width}}  {sum(timings.values()):>9.1f} ms")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    with timed("import app"):
+        from app import app  # noqa: F401
+    from blueprints.main import warm_up as warm_up_app
+
+    warm_up_app()
+    print(report())
@@ -0,0 +1,287 @@
+'''
+Трассы резолюции: фильтрация шагов, выдача страницами и хранение в базе.
+
+Страница резолюции показывает только первую страницу шагов; вся трасса
+сохраняется по строке на шаг (таблицы ResolutionTrace и TraceStep), и
+остальные страницы клиент подгружает через JSON API (`/api/v1/traces/<id>`).
+Шаги пишутся в базу пакетами по мере вывода (`TraceRecorder`), а страница
+выбирается запросом ORDER BY idx LIMIT/OFFSET, поэтому ни память сервера,
+ни стоимость страницы не растут с размером трассы.
+
+Виды (view): all — все шаги, proof — только шаги, из которых выведен
+пустой дизъюнкт, initial / resolve — шаги одного типа.
+'''
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import insert, update
+
+from utilities.db import db, ResolutionTrace, TraceStep
+from utilities.Resolution import extract_proof
+
+TRACE_PAGE_SIZE = int(os.getenv("TRACE_PAGE_SIZE", "100"))
+TRACE_MAX_PAGE_SIZE = 1000
+# Сколько шагов накапливать в памяти перед записью в базу
+TRACE_WRITE_BATCH = int(os.getenv("TRACE_WRITE_BATCH", "500"))
+# Сколько хранить сохранённые трассы, с
+TRACE_TTL = float(os.getenv("TRACE_TTL", str(24 * 3600)))
+
+# Типы шагов резолюции (TraceStep.info). Шаг ошибки разбора несёт в info
+# текст исключения: в столбец пишется "Error", сам текст остаётся в step
+STEP_KINDS = {"Initial", "Resolve", "Contradiction", "Error"}
+
+# Вид -> (типы шагов или None для всех, только доказательство)
+VIEWS = {
+    "all": (None, False),
+    "proof": (None, True),
+    "initial": ({"Initial"}, False),
+    "resolve": ({"Resolve"}, False),
+}
+
+
+def filter_steps(steps: List[Dict[str, Any]], info: Optional[Iterable[str]] = None,
+                 proof: bool = False) -> List[Dict[str, Any]]:
+    """Отбирает шаги доказательства (`proof`) и/или шаги с типом из `info`."""
+    if proof:
+        steps = extract_proof(steps)
+    if info:
+        kinds: Set[str] = set(info)
+        steps = [step for step in steps if step_kind(step) in kinds]
+    return steps
+
+
+def view_steps(steps: List[Dict[str, Any]], view: str = "all") -> List[Dict[str, Any]]:
+    info, proof = VIEWS.get(view, VIEWS["all"])
+    return filter_steps(steps, info, proof)
+
+
+def step_kind(step: Dict[str, Any]) -> str:
+    """Тип шага для столбца TraceStep.info (один из STEP_KINDS)."""
+    return step["info"] if step["info"] in STEP_KINDS else "Error"
+
+
+def page_bounds(total: int, page: int, per_page: int):
+    """Приводит номер и размер страницы к допустимым: (page, pages, per_page)."""
+    per_page = max(1, min(per_page, TRACE_MAX_PAGE_SIZE))
+    pages = max(1, -(-total // per_page))
+    return max(1, min(page, pages)), pages, per_page
+
+
+def paginate(steps: List[Dict[str, Any]], page: int = 1, per_page: int = TRACE_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Одна страница шагов из списка в памяти (нумерация с 1):
+    {"steps": [...], "page", "pages", "per_page", "total"}.
+    """
+    page, pages, per_page = page_bounds(len(steps), page, per_page)
+    start = (page - 1) * per_page
+    return {
+        "steps": steps[start:start + per_page],
+        "page": page,
+        "pages": pages,
+        "per_page": per_page,
+        "total": len(steps),
+    }
+
+
+def delete_expired() -> None:
+    expired = db.session.query(ResolutionTrace.id).filter(ResolutionTrace.created_at < time.time() - TRACE_TTL)
+    TraceStep.query.filter(TraceStep.trace_id.in_(expired.scalar_subquery())).delete(synchronize_session=False)
+    ResolutionTrace.query.filter(ResolutionTrace.created_at < time.time() - TRACE_TTL).delete(synchronize_session=False)
+
+
+def whole_page(steps: List[Dict[str, Any]], view: str = "all") -> Dict[str, Any]:
+    """Все шаги одной страницей (как paginate): для трасс, которые не сохранялись в базу."""
+    total = len(steps)
+    return {"steps": steps, "page": 1, "pages": 1, "per_page": max(total, 1), "total": total,
+            "id": None, "view": view}
+
+
+class TraceRecorder:
+    """
+    Принимает шаги по мере вывода и пишет их в базу пакетами.
+
+    В памяти остаются только первая страница (`head`, per_page шагов) и ещё
+    не записанный пакет. Трасса создаётся в базе, только когда шагов больше
+    одной страницы; с per_page=0 — сразу, при первом шаге.
+
+    Если база недоступна, трасса целиком остаётся в памяти (`stored` = False)
+    и показывается одной страницей, как до хранения в базе. Незавершённая
+    трасса (клиент отключился, ошибка) удаляется в `close`, который вызывается
+    в finally вокруг вывода.
+    """
+
+    def __init__(self, per_page: int = TRACE_PAGE_SIZE):
+        self.per_page = per_page
+        self.head: List[Dict[str, Any]] = []
+        self.pending: List[Dict[str, Any]] = []
+        self.total = 0
+        self.written = 0
+        self.trace_id: Optional[str] = None
+        self.stored = True
+        self.finished = False
+
+    def add(self, step: Dict[str, Any]) -> None:
+        if self.total < self.per_page:
+            self.head.append(step)
+        self.total += 1
+        if self.total <= self.per_page:
+            return
+        if self.total == self.per_page + 1:
+            # шагов больше страницы: трасса уходит в базу, начиная с head
+            self.pending = self.head + [step]
+            self._create()
+        else:
+            self.pending.append(step)
+        if self.trace_id is not None and len(self.pending) >= TRACE_WRITE_BATCH:
+            self.flush()
+
+    def _create(self) -> None:
+        try:
+            delete_expired()
+            trace_id = uuid.uuid4().hex
+            db.session.add(ResolutionTrace(id=trace_id, total=0, created_at=time.time()))
+            db.session.commit()
+            self.trace_id = trace_id
+        except Exception:
+            self._fall_back()
+
+    def _fall_back(self) -> None:
+        """База недоступна: дальше шаги копятся в памяти, начатая трасса удаляется."""
+        db.session.rollback()
+        self._discard()
+        self.trace_id = None
+        self.stored = False
+
+    def _discard(self) -> None:
+        if self.trace_id is None:
+            return
+        try:
+            TraceStep.query.filter(TraceStep.trace_id == self.trace_id).delete(synchronize_session=False)
+            ResolutionTrace.query.filter(ResolutionTrace.id == self.trace_id).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            # не удалось — трассу без итога уберёт delete_expired
+            db.session.rollback()
+
+    def flush(self) -> None:
+        if not self.pending or self.trace_id is None:
+            return
+        rows = [
+            {"trace_id": self.trace_id, "idx": self.written + i, "step_id": step["id"],
+             "info": step_kind(step), "in_proof": False, "step": step}
+            for i, step in enumerate(self.pending)
+        ]
+        try:
+            db.session.execute(insert(TraceStep), rows)
+            db.session.commit()
+        except Exception:
+            self._fall_back()
+            return
+        self.written += len(rows)
+        self.pending = []
+
+    def finish(self, result: str, proof: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+        """Дописывает шаги, отмечает шаги доказательства и итог; возвращает id трассы или None."""
+        self.finished = True
+        if self.trace_id is None:
+            return None
+        self.flush()
+        if self.trace_id is None:
+            return None
+        try:
+            if proof:
+                db.session.execute(
+                    update(TraceStep)
+                    .where(TraceStep.trace_id == self.trace_id, TraceStep.step_id.in_([s["id"] for s in proof]))
+                    .values(in_proof=True)
+                )
+            db.session.execute(
+                update(ResolutionTrace).where(ResolutionTrace.id == self.trace_id).values(result=result, total=self.total)
+            )
+            db.session.commit()
+        except Exception:
+            self._fall_back()
+        return self.trace_id
+
+    def close(self) -> None:
+        """Удаляет трассу, если вывод прервался до finish."""
+        if not self.finished:
+            self._discard()
+            self.trace_id = None
+            self.finished = True
+
+    def steps_in_memory(self) -> List[Dict[str, Any]]:
+        """
+        Шаги, оставшиеся в памяти: первая страница и всё, что не записано в базу.
+        Если база отказала посреди трассы, уже записанные в неё шаги сюда не входят.
+        """
+        return self.head + self.pending[max(0, len(self.head) - self.written):]
+
+    def first_page(self, view: str = "all") -> Dict[str, Any]:
+        """
+        Первая страница вида `view`. Если трасса не сохранялась, все шаги в
+        head; иначе страница выбирается из базы. "id" — трасса для подгрузки
+        остальных страниц (None, если всё уже на этой странице).
+        """
+        if not self.stored:
+            return whole_page(view_steps(self.steps_in_memory(), view), view)
+        if self.trace_id is None:
+            page = paginate(view_steps(self.head, view), 1, self.per_page or TRACE_PAGE_SIZE)
+            page["id"] = None
+        else:
+            info, proof = VIEWS.get(view, VIEWS["all"])
+            try:
+                page = load_page(self.trace_id, 1, self.per_page, info, proof)
+            except Exception:
+                # база отказала после записи: показываем первую страницу из памяти
+                db.session.rollback()
+                page = None
+            if page is None:
+                page = paginate(view_steps(self.head, view), 1, self.per_page or TRACE_PAGE_SIZE)
+                page["id"] = None
+            elif page["pages"] < 2:
+                page["id"] = None
+        page["view"] = view
+        return page
+
+
+def save_trace(result: str, steps: List[Dict[str, Any]], proof: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Сохраняет готовый список шагов и возвращает id трассы."""
+    recorder = TraceRecorder(per_page=0)
+    for step in steps:
+        recorder.add(step)
+    return recorder.finish(result, proof if proof is not None else extract_proof(steps))
+
+
+def get_trace(trace_id: str) -> Optional[ResolutionTrace]:
+    return db.session.get(ResolutionTrace, trace_id)
+
+
+def load_page(trace_id: str, page: int = 1, per_page: int = TRACE_PAGE_SIZE,
+              info: Optional[Iterable[str]] = None, proof: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Страница шагов сохранённой трассы (как paginate) с "id" и "result";
+    None, если трассы нет. Из базы читаются только шаги этой страницы.
+    """
+    trace = get_trace(trace_id)
+    if trace is None:
+        return None
+    query = TraceStep.query.filter(TraceStep.trace_id == trace_id)
+    if info:
+        query = query.filter(TraceStep.info.in_(list(info)))
+    if proof:
+        query = query.filter(TraceStep.in_proof.is_(True))
+    total = trace.total if not info and not proof else query.count()
+    page, pages, per_page = page_bounds(total, page, per_page)
+    rows = query.order_by(TraceStep.idx).offset((page - 1) * per_page).limit(per_page).all()
+    return {
+        "steps": [row.step for row in rows],
+        "page": page,
+        "pages": pages,
+        "per_page": per_page,
+        "total": total,
+        "id": trace.id,
+        "result": trace.result,
+    }
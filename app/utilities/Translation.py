@@ -0,0 +1,331 @@
+'''
+Слой перевода: подключаемые бэкенды, кеш предложений и перевод термов формул FOL.
+
+Бэкенды: `google` (GoogleTranslator, по умолчанию) и `offline` — локальная
+таблица фраз без обращения к сети. Переводчик `Translator` кеширует переводы
+(память + SQLite, см. LLMCache), замеряет время каждого вызова и при ошибке
+основного бэкенда (нет сети, таймаут, ограничение частоты) переводит запасным.
+После ошибки основной бэкенд пропускается TRANSLATION_COOLDOWN секунд, чтобы
+следующие запросы не ждали таймаута заново.
+
+Все термы формулы, которых нет в кеше, переводятся одним запросом к переводчику.
+'''
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utilities.LLMCache import ResponseCache, cache_key
+
+TRANSLATION_CACHE_PATH = os.getenv(
+    "TRANSLATION_CACHE_PATH", os.path.join(os.path.dirname(__file__), "..", "translation_cache.sqlite3")
+)
+TRANSLATION_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", str(90 * 24 * 3600)))
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")
+TRANSLATION_FALLBACK = os.getenv("TRANSLATION_FALLBACK", "offline")
+PHRASE_TABLE_PATH = os.getenv("TRANSLATION_PHRASE_TABLE", os.path.join(os.path.dirname(__file__), "phrase_table.json"))
+# Сколько ждать ответа сетевого бэкенда, с
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "3"))
+# Сколько не обращаться к основному бэкенду после его ошибки, с
+TRANSLATION_COOLDOWN = float(os.getenv("TRANSLATION_COOLDOWN", "60"))
+
+# Терм — слово из латинских букв, целиком отделённое от соседних символов
+TERM_RE = re.compile(r"\b[A-Za-z]+\b")
+VARIABLES = {"x", "w", "y", "z", "k"}
+
+_memo: Optional[ResponseCache] = None
+
+
+def get_memo() -> ResponseCache:
+    """Возвращает общий кеш переводов, создавая его при первом обращении."""
+    global _memo
+    if _memo is None:
+        try:
+            _memo = ResponseCache(path=TRANSLATION_CACHE_PATH, ttl=TRANSLATION_TTL)
+        except Exception:
+            _memo = ResponseCache(path=None, ttl=TRANSLATION_TTL)
+    return _memo
+
+
+# Потоки для сетевых запросов перевода: deep_translator вызывает requests без
+# таймаута, поэтому ответ ждётся не дольше TRANSLATION_TIMEOUT через future
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TRANSLATION_MAX_WORKERS", "4")), thread_name_prefix="translate")
+
+
+class GoogleBackend:
+    """
+    Перевод через Google Translate (deep_translator, нужен доступ в сеть).
+    Если ответа нет дольше `timeout`, бросается TimeoutError; зависший запрос
+    дорабатывает в фоне, вызывающий его не ждёт.
+    """
+
+    name = "google"
+
+    def __init__(self, source: str, target: str, timeout: float = TRANSLATION_TIMEOUT):
+        from deep_translator import GoogleTranslator
+
+        self.translator = GoogleTranslator(source=source, target=target)
+        self.timeout = timeout
+
+    def _call(self, fn, *args):
+        future = _executor.submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise TimeoutError(f"Google Translate не ответил за {self.timeout} с") from None
+
+    def translate(self, text: str) -> str:
+        return self._call(self.translator.translate, text)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return self._call(self.translator.translate_batch, texts)
+
+
+_phrase_tables: Dict[str, Dict[str, str]] = {}
+
+
+def load_phrase_table(source: str, target: str, path: str = PHRASE_TABLE_PATH) -> Dict[str, str]:
+    """
+    Загружает таблицу фраз для направления `source-target`.
+
+    В файле хранятся таблицы вида {"ru-en": {"фраза": "phrase"}}; если нужного
+    направления нет, используется обратная таблица (первый перевод выигрывает).
+    """
+    direction = f"{source}-{target}"
+    table = _phrase_tables.get(direction)
+    if table is None:
+        with open(path, encoding="utf-8") as f:
+            tables = json.load(f)
+        if direction in tables:
+            table = {k.lower(): v for k, v in tables[direction].items()}
+        else:
+            table = {}
+            for phrase, translation in tables.get(f"{target}-{source}", {}).items():
+                table.setdefault(translation.lower(), phrase)
+        _phrase_tables[direction] = table
+    return table
+
+
+class PhraseTableBackend:
+    """
+    Офлайн-перевод по таблице фраз: жадно подбирается самая длинная известная
+    фраза (до трёх слов), неизвестные слова остаются как есть. Грубая замена
+    настоящему переводчику — чтобы страница работала без сети.
+    """
+
+    name = "offline"
+    WORD_RE = re.compile(r"[\w-]+|[^\w-]+")
+
+    def __init__(self, source: str, target: str, table: Optional[Dict[str, str]] = None):
+        self.table = table if table is not None else load_phrase_table(source, target)
+
+    def translate(self, text: str) -> str:
+        tokens = self.WORD_RE.findall(text)
+        words = [i for i, t in enumerate(tokens) if t[0].isalnum() or t[0] in "_-"]
+        out = []
+        i = 0
+        while i < len(words):
+            for size in (3, 2, 1):
+                group = words[i:i + size]
+                if len(group) < size:
+                    continue
+                phrase = " ".join(tokens[j].lower() for j in group)
+                translation = self.table.get(phrase)
+                if translation is not None:
+                    break
+            else:
+                group, translation = words[i:i + 1], tokens[words[i]]
+            out.append((group, translation))
+            i += len(group)
+
+        result = []
+        position = 0
+        for group, translation in out:
+            # знаки препинания и пробелы перед группой сохраняются
+            result.extend(tokens[position:group[0]])
+            original = tokens[group[0]]
+            if original[:1].isupper() and translation[:1].islower():
+                translation = translation[:1].upper() + translation[1:]
+            result.append(translation)
+            position = group[-1] + 1
+        result.extend(tokens[position:])
+        return "".join(result)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return [self.translate(t) for t in texts]
+
+
+# Реестр бэкендов перевода: имя -> класс (source, target)
+BACKENDS = {
+    "google": GoogleBackend,
+    "offline": PhraseTableBackend,
+}
+
+
+class Translator:
+    """
+    Переводчик с кешем предложений, замером времени и запасным бэкендом.
+    Бэкенды создаются при первом переводе (Google тянет deep_translator).
+
+    Args:
+        source (str): Исходный язык.
+        target (str): Язык перевода.
+        backend (str): Имя основного бэкенда (по умолчанию TRANSLATION_BACKEND).
+        fallback (str | None): Запасной бэкенд на случай ошибки основного.
+    """
+
+    def __init__(self, source: str, target: str, backend: Optional[str] = None,
+                 fallback: Optional[str] = TRANSLATION_FALLBACK):
+        self.source = source
+        self.target = target
+        self.backend_name = backend or TRANSLATION_BACKEND
+        self.fallback_name = fallback if fallback and fallback != self.backend_name else None
+        if self.backend_name not in BACKENDS or (self.fallback_name and self.fallback_name not in BACKENDS):
+            raise ValueError(f"Неизвестный бэкенд перевода: {self.backend_name}, {self.fallback_name}")
+        self._backends: Dict[str, object] = {}
+        # До какого момента (time.monotonic) основной бэкенд пропускается после ошибки
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self.direction = f"sentence:{self.backend_name}:{source}-{target}"
+
+    def _get_backend(self, name: str):
+        backend = self._backends.get(name)
+        if backend is None:
+            backend = BACKENDS[name](self.source, self.target)
+            self._backends[name] = backend
+        return backend
+
+    @property
+    def backend(self):
+        return self._get_backend(self.backend_name)
+
+    @property
+    def fallback(self):
+        return self._get_backend(self.fallback_name) if self.fallback_name else None
+
+    def primary_available(self) -> bool:
+        """Можно ли обращаться к основному бэкенду (не идёт пауза после ошибки)."""
+        return self.fallback_name is None or time.monotonic() >= self._down_until
+
+    def _primary_failed(self) -> None:
+        with self._lock:
+            self._down_until = time.monotonic() + TRANSLATION_COOLDOWN
+
+    def translate_timed(self, text: str, cache: bool = True) -> Tuple[str, Dict[str, object]]:
+        """
+        Переводит текст и возвращает его вместе с замером:
+        {"backend": "cache" | имя бэкенда, "ms": время в миллисекундах,
+        "fallback": переведено ли запасным бэкендом}.
+
+        cache=False — не обращаться к кешу предложений (термы и их пакеты
+        кешируются отдельно, в translate_terms).
+        """
+        started = time.perf_counter()
+        memo = get_memo()
+        key = cache_key(self.direction, text, 0)
+        translated = memo.get(key) if cache else None
+        used = "cache"
+        fallback = False
+        if translated is None:
+            try:
+                if not self.primary_available():
+                    raise RuntimeError(f"Бэкенд {self.backend_name} на паузе после ошибки")
+                translated = self.backend.translate(text)
+                used = self.backend.name
+                if translated and cache:
+                    memo.set(key, self.direction, translated)
+            except Exception:
+                if self.fallback is None:
+                    raise
+                if self.primary_available():
+                    self._primary_failed()
+                # результат запасного бэкенда не кешируется: когда сеть вернётся,
+                # предложение переведётся нормально
+                translated = self.fallback.translate(text)
+                used = self.fallback.name
+                fallback = True
+        elapsed = round((time.perf_counter() - started) * 1000, 2)
+        return translated, {"backend": used, "ms": elapsed, "fallback": fallback}
+
+    def translate(self, text: str) -> str:
+        return self.translate_timed(text)[0]
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return [self.translate(t) for t in texts]
+
+
+def _translate_one(text: str, translator) -> Tuple[str, bool]:
+    """
+    Перевод и признак того, что его можно кешировать (не запасной бэкенд).
+    Кеш предложений не используется: термы кеширует translate_terms.
+    """
+    if isinstance(translator, Translator):
+        translated, timing = translator.translate_timed(text, cache=False)
+        return translated, not timing["fallback"]
+    return translator.translate(text), True
+
+
+def translate_many(texts: List[str], translator) -> Tuple[List[str], bool]:
+    """
+    Переводит список коротких текстов одним запросом.
+
+    Тексты склеиваются через перевод строки; если переводчик вернул другое
+    число строк, тексты переводятся по одному.
+
+    Returns:
+        Tuple[List[str], bool]: Переводы и признак, что их можно кешировать.
+    """
+    if not texts:
+        return [], True
+    joined, cacheable = _translate_one("\n".join(texts), translator)
+    lines = (joined or "").split("\n")
+    if len(lines) == len(texts):
+        return [line.strip() for line in lines], cacheable
+    if not isinstance(translator, Translator):
+        return translator.translate_batch(texts), True
+    results = [_translate_one(t, translator) for t in texts]
+    return [t for t, _ in results], all(c for _, c in results)
+
+
+def translate_terms(terms: Iterable[str], translator) -> Dict[str, str]:
+    """
+    Возвращает словарь терм -> перевод (пробелы заменены на '_').
+
+    Переменные не переводятся; переводы берутся из кеша, остальные
+    запрашиваются у переводчика одним вызовом и сохраняются в кеш.
+    """
+    memo = get_memo()
+    direction = f"translate:{translator.source}-{translator.target}"
+    result: Dict[str, str] = {}
+    misses: List[str] = []
+    for term in terms:
+        if term in VARIABLES:
+            result[term] = term
+            continue
+        cached = memo.get(cache_key(direction, term, 0))
+        if cached is not None:
+            result[term] = cached
+        else:
+            misses.append(term)
+
+    translations, cacheable = translate_many(misses, translator)
+    for term, translated in zip(misses, translations):
+        translated = (translated or term).strip().replace(" ", "_")
+        result[term] = translated
+        if cacheable:
+            memo.set(cache_key(direction, term, 0), direction, translated)
+    return result
+
+
+def translate_fol_terms(fol_formula: str, translator) -> str:
+    """
+    Переводит только термы (слова) формулы FOL, сохраняя её логическую структуру.
+    Все замены выполняются за один проход регулярного выражения.
+    """
+    terms = dict.fromkeys(TERM_RE.findall(fol_formula))
+    translation_map = translate_terms(terms, translator)
+    return TERM_RE.sub(lambda m: translation_map.get(m.group(0), m.group(0)), fol_formula)
@@ -6,3 +6,41 @@ db = SQLAlchemy()
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+
+
+class Job(db.Model):
+    """Задание фоновой очереди (см. utilities/JobQueue.py)."""
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Время в секундах Unix: постановка в очередь, начало и конец выполнения
+    created_at = db.Column(db.Float, nullable=False, index=True)
+    started_at = db.Column(db.Float)
+    finished_at = db.Column(db.Float)
+    # Последний сигнал жизни от воркера, выполняющего задание (аренда)
+    heartbeat_at = db.Column(db.Float)
+
+
+class ResolutionTrace(db.Model):
+    """Сохранённая трасса резолюции для постраничного просмотра (см. utilities/Traces.py)."""
+    id = db.Column(db.String(32), primary_key=True)
+    # Итог заполняется, когда резолюция завершится
+    result = db.Column(db.Text)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.Float, nullable=False, index=True)
+
+
+class TraceStep(db.Model):
+    """Шаг сохранённой трассы: по строке на шаг, страницы выбираются по idx."""
+    trace_id = db.Column(db.String(32), db.ForeignKey("resolution_trace.id"), primary_key=True)
+    # Порядковый номер шага в трассе (с 0)
+    idx = db.Column(db.Integer, primary_key=True)
+    # Номер дизъюнкта в резолюции (step["id"])
+    step_id = db.Column(db.Integer, nullable=False)
+    info = db.Column(db.String(20), nullable=False)
+    in_proof = db.Column(db.Boolean, nullable=False, default=False)
+    step = db.Column(db.JSON, nullable=False)
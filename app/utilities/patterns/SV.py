@@ -1,6 +1,7 @@
 from typing import Any
 from .base import Base
-from .utils import ROLE_TO_VAR, QUANTIFIER_RULE
+from .utils import ROLE_TO_VAR
+from .formula import predicate, quantified
 
 
 class SV(Base):
@@ -17,12 +18,15 @@ class SV(Base):
     2.  **Отсутствие** любых видов объектов (**dobj**, **iobj**, **pobj**).
     3.  **Отсутствие** любых видов комплементов (**attr**, **acomp**, **xcomp**, **ccomp**).
 
-    ### Логическое преобразование (convert):
+    ### Логическое преобразование (convert_formula):
     Формула вида: `Qx ( Subject(x) RULE ¬Predicate(x) )`,
     где **Predicate** — лемма глагола (`ROOT`), а отрицание (`¬`) вычисляется
     через XOR отрицаний квантора субъекта и глагола.
     """
 
+    required_deps = frozenset({"nsubj"})
+    forbidden_deps = frozenset({"dobj", "iobj", "pobj", "attr", "acomp", "xcomp", "ccomp"})
+
     def match(self, doc: Any) -> bool:
         """
         Проверяет наличие субъекта и отсутствие всех видов объектов и комплементов.
@@ -47,9 +51,9 @@ class SV(Base):
 
         return subj is not None and not has_object and not has_complement
 
-    def convert(self, doc: Any) -> str:
+    def convert_formula(self, doc: Any) -> Any:
         """
-        Преобразует SV-предложение в формулу логики первого порядка.
+        Строит формулу логики первого порядка для SV-предложения.
         """
         root = self.find_root(doc)
         subj_token = [c for c in root.children if c.dep_ == "nsubj"][0]
@@ -65,17 +69,15 @@ class SV(Base):
         # Если "A student" (False) ... "does not sleep" (True) -> Negate predicate
         # Если "No student" (True) ... "does not sleep" (True) -> Positive predicate (Double neg)
         final_negation = is_quant_neg ^ is_verb_neg  # XOR
-        
-        neg_symbol = "¬" if final_negation else ""
 
         # 4. Формируем переменные
         var = ROLE_TO_VAR['nsubj']
-        predicate = root.lemma_.capitalize()
-        rule = QUANTIFIER_RULE[subj_quant]
+        pred_name = root.lemma_.capitalize()
 
         # 5. Сборка формулы
         # Пример: ∀x (Student(x) → ¬Sleep(x))
-        return f"{subj_quant}{var} ({subj_noun}({var}) {rule} {neg_symbol}{predicate}({var}))"
+        atom = predicate(pred_name, var, negated=final_negation)
+        return quantified(subj_quant, var, subj_noun, atom)
 
     def __str__(self) -> str:
         """
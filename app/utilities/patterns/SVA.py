@@ -1,6 +1,7 @@
 from typing import Any, Optional
 from .base import Base
-from .utils import ROLE_TO_VAR, QUANTIFIER_RULE
+from .utils import ROLE_TO_VAR
+from .formula import predicate, quantified
 
 
 class SVA(Base):
@@ -22,7 +23,7 @@ class SVA(Base):
         - **npadvmod** (именная группа как обстоятельство),
         - **prep** (предлог, ведущий к **pobj**).
 
-    ### Логическое преобразование (convert):
+    ### Логическое преобразование (convert_formula):
     Формула вложенная, так как обстоятельство рассматривается как второй предикат:
     `Q1x ( Subject(x) RULE1 Q2y ( Adverb(y) RULE2 Predicate(x, y) ) )`
     
@@ -31,6 +32,9 @@ class SVA(Base):
     - Отрицание (`¬`) вычисляется как XOR трех компонентов: субъекта, глагола и обстоятельства.
     """
 
+    required_deps = frozenset({"nsubj"})
+    any_of_deps = (frozenset({"advmod", "obl", "npadvmod", "prep"}),)
+
     def match(self, doc: Any) -> bool:
         """
         Проверяет наличие субъекта и хотя бы одного типа обстоятельства (advmod, obl, npadvmod, prep).
@@ -78,24 +82,24 @@ class SVA(Base):
 
         return None
 
-    def convert(self, doc: Any) -> str:
+    def convert_formula(self, doc: Any) -> Optional[Any]:
         """
-        Преобразует SVA-предложение в формулу с вложенной квантификацией.
+        Строит для SVA-предложения формулу с вложенной квантификацией.
         """
         root = self.find_root(doc)
         if not root:
-            return ""
+            return None
 
         # subj token
         subj_tokens = [c for c in root.children if c.dep_ == "nsubj"]
         if not subj_tokens:
-            return ""
+            return None
         subj_token = subj_tokens[0]
 
         # adv token (учитываем prep->pobj)
         adv_token = self._get_adv_token(root)
         if adv_token is None:
-            return ""
+            return None
 
         # 1. Извлечение данных для субъекта
         subj_noun, subj_quant, subj_is_neg = self.extract_quantified_noun(subj_token)
@@ -119,28 +123,23 @@ class SVA(Base):
 
         # 5. Общая логика отрицаний (xor)
         final_neg = subj_is_neg ^ verb_is_neg ^ adv_is_neg
-        neg_symbol = "¬" if final_neg else ""
 
         # 6. Переменные
         xv = ROLE_TO_VAR.get('nsubj', 'x')
         yv = ROLE_TO_VAR.get('advmod', ROLE_TO_VAR.get('dobj', 'y'))
 
-        # 7. Правила соединения (используем QUANTIFIER_RULE для adv,
-        #   и правило между Subject и вложенной формулой — как в других частях)
-        subj_rule = "→" if subj_quant == "∀" else "∧"
-        adv_rule = QUANTIFIER_RULE.get(adv_quant, "→")
-
-        # 8. Предикат (лемма глагола, с заглавной буквы)
+        # 7. Предикат (лемма глагола, с заглавной буквы)
         pred_name = root.lemma_.capitalize()
 
-        # 9. Формирование атома: например "¬Run(x, y)"
-        atom = f"{neg_symbol}{pred_name}({xv}, {yv})"
+        # 8. Формирование атома: например "¬Run(x, y)"
+        atom = predicate(pred_name, xv, yv, negated=final_neg)
 
-        # 10. Вложенная формула для обстоятельства
-        object_formula = f"{adv_quant}{yv} ({adv_noun}({yv}) {adv_rule} {atom})"
+        # 9. Вложенная формула для обстоятельства
+        # (связки → / ∧ выбираются по квантору, см. QUANTIFIER_RULE)
+        object_formula = quantified(adv_quant, yv, adv_noun, atom)
 
-        # 11. Финальная формула
-        return f"{subj_quant}{xv} ({subj_noun}({xv}) {subj_rule} {object_formula})"
+        # 10. Финальная формула
+        return quantified(subj_quant, xv, subj_noun, object_formula)
 
     def __str__(self) -> str:
         """
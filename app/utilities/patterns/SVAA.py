@@ -1,6 +1,7 @@
 from typing import Any, List, Optional
 from .base import Base
-from .utils import ROLE_TO_VAR, QUANTIFIER_RULE
+from .utils import ROLE_TO_VAR
+from .formula import predicate, quantified
 
 
 class SVAA(Base):
@@ -18,7 +19,7 @@ class SVAA(Base):
     2.  Наличие **минимум двух** обстоятельств среди детей корня.
         Типы обстоятельств: **advmod**, **obl**, **npadvmod**, **prep**.
 
-    ### Логическое преобразование (convert):
+    ### Логическое преобразование (convert_formula):
     Формула с двойным вложением:
     `Q1x ( Subject(x) RULE1 Q2y ( Adv1(y) RULE2 Q3z ( Adv2(z) RULE3 Predicate(x, y, z) ) ) )`
 
@@ -28,6 +29,9 @@ class SVAA(Base):
     - Отрицание вычисляется как XOR(subj, verb, adv1, adv2).
     """
 
+    required_deps = frozenset({"nsubj"})
+    any_of_deps = (frozenset({"advmod", "obl", "npadvmod", "prep", "acomp", "xcomp"}),)
+
     def _is_adv(self, token: Any) -> bool:
         """Проверяет, является ли токен обстоятельством."""
         # acomp и xcomp добавлены, так как иногда adjective complement выступает в роли "как?"
@@ -78,7 +82,7 @@ class SVAA(Base):
             return token
         return token
 
-    def convert(self, doc: Any) -> str:
+    def convert_formula(self, doc: Any) -> Any:
         root = self.find_root(doc)
         
         # 1. Субъект
@@ -109,27 +113,22 @@ class SVAA(Base):
         # 4. Логика отрицания
         verb_neg = self.is_negated(root)
         final_neg = subj_neg ^ verb_neg ^ adv1_neg ^ adv2_neg
-        neg_symbol = "¬" if final_neg else ""
 
         # 5. Переменные
         xv = "x"
         yv = "y"
         zv = "z"
 
-        subj_rule = QUANTIFIER_RULE[subj_quant]
-        adv1_rule = QUANTIFIER_RULE[adv1_quant]
-        adv2_rule = QUANTIFIER_RULE[adv2_quant]
-
         pred_name = root.lemma_.capitalize()
 
         # 6. Сборка формулы
-        atom = f"{neg_symbol}{pred_name}({xv}, {yv}, {zv})"
+        atom = predicate(pred_name, xv, yv, zv, negated=final_neg)
         
         # Порядок вложенности: Adv2 -> Adv1 -> Subj
         # (Порядок y и z не критичен для логики, но мы сохраняем структуру)
-        level3 = f"{adv2_quant}{zv} ({adv2_noun}({zv}) {adv2_rule} {atom})"
-        level2 = f"{adv1_quant}{yv} ({adv1_noun}({yv}) {adv1_rule} {level3})"
-        final_formula = f"{subj_quant}{xv} ({subj_noun}({xv}) {subj_rule} {level2})"
+        level3 = quantified(adv2_quant, zv, adv2_noun, atom)
+        level2 = quantified(adv1_quant, yv, adv1_noun, level3)
+        final_formula = quantified(subj_quant, xv, subj_noun, level2)
 
         return final_formula
 
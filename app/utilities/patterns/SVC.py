@@ -1,6 +1,7 @@
 from typing import Any
 from .base import Base
-from .utils import ROLE_TO_VAR, QUANTIFIER_RULE
+from .utils import ROLE_TO_VAR
+from .formula import predicate, quantified
 
 
 class SVC(Base):
@@ -17,11 +18,15 @@ class SVC(Base):
     2.  Наличие **attr** (номинальный комплемент) или **acomp** (адъективный комплемент).
     3.  **Отсутствие** прямого объекта (**dobj**).
 
-    ### Логическое преобразование (convert):
+    ### Логическое преобразование (convert_formula):
     Формула вида: `Qx ( Subject(x) RULE ¬Complement(x) )`,
     где отрицание (`¬`) вычисляется через XOR отрицаний квантора субъекта и глагола.
     """
 
+    required_deps = frozenset({"nsubj"})
+    any_of_deps = (frozenset({"attr", "acomp"}),)
+    forbidden_deps = frozenset({"dobj"})
+
     def match(self, doc: Any) -> bool:
         """
         Проверяет наличие субъекта и комплемента, а также отсутствие прямого объекта.
@@ -44,9 +49,9 @@ class SVC(Base):
 
         return subj is not None and complement is not None and not has_object
 
-    def convert(self, doc: Any) -> str:
+    def convert_formula(self, doc: Any) -> Any:
         """
-        Преобразует SVC-предложение в формулу логики первого порядка.
+        Строит формулу логики первого порядка для SVC-предложения.
         """
         root = self.find_root(doc)
 
@@ -64,16 +69,15 @@ class SVC(Base):
         # "Student is not lazy" -> False ^ True = True (Negate pred)
         # "No student is not lazy" -> True ^ True = False (Positive pred)
         final_negation = subj_is_neg ^ verb_is_neg
-        neg_symbol = "¬" if final_negation else ""
 
         # Предикат комплемента
         comp_predicate = comp_token.lemma_.capitalize()
 
         var = ROLE_TO_VAR['nsubj']
-        rule = QUANTIFIER_RULE[subj_quant]
 
         # Формируем: Qx (Subj(x) RULE ¬Comp(x))
-        return f"{subj_quant}{var} ({subj_noun}({var}) {rule} {neg_symbol}{comp_predicate}({var}))"
+        atom = predicate(comp_predicate, var, negated=final_negation)
+        return quantified(subj_quant, var, subj_noun, atom)
 
     def __str__(self) -> str:
         """
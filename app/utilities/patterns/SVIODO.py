@@ -1,6 +1,7 @@
-from typing import Any
+from typing import Any, Optional
 from .base import Base
-from .utils import ROLE_TO_VAR, QUANTIFIER_RULE
+from .utils import ROLE_TO_VAR
+from .formula import predicate, quantified
 
 
 class SVIODO(Base):
@@ -19,7 +20,7 @@ class SVIODO(Base):
     3.  Наличие **iobj** или **dative** (косвенного дополнения — "кому").
         *Примечание: SpaCy может использовать `dative` для косвенного дополнения.*
 
-    ### Логическое преобразование (convert):
+    ### Логическое преобразование (convert_formula):
     Формула с тройной вложенностью:
     `Q1x ( Subject(x) R1 Q2y ( IObj(y) R2 Q3z ( DObj(z) R3 Predicate(x, y, z) ) ) )`
     
@@ -28,6 +29,8 @@ class SVIODO(Base):
     - Переменные: Subj -> x, IO -> y, DO -> z.
     """
 
+    required_deps = frozenset({"nsubj", "dobj"})
+
     def match(self, doc: Any) -> bool:
         """
         Проверяет наличие субъекта, прямого дополнения и косвенного дополнения.
@@ -65,13 +68,13 @@ class SVIODO(Base):
                 
         return has_subj and has_dobj and has_iobj
 
-    def convert(self, doc: Any) -> str:
+    def convert_formula(self, doc: Any) -> Optional[Any]:
         """
-        Преобразует SVIODO-предложение в формулу логики предикатов.
+        Строит формулу логики предикатов для SVIODO-предложения.
         """
         root = self.find_root(doc)
         if not root:
-            return ""
+            return None
 
         # Поиск токенов
         subj_token = None
@@ -89,7 +92,7 @@ class SVIODO(Base):
                 iobj_token = child
 
         if not (subj_token and dobj_token and iobj_token):
-            return ""
+            return None
 
         # 1. Извлечение данных (существительное, квантор, отрицание) для всех частей
         subj_noun, subj_quant, s_neg = self.extract_quantified_noun(subj_token)
@@ -102,7 +105,6 @@ class SVIODO(Base):
         # 3. Итоговое отрицание (4-way XOR)
         # ¬(S ^ V ^ IO ^ DO)
         final_neg = s_neg ^ v_neg ^ io_neg ^ do_neg
-        neg_symbol = "¬" if final_neg else ""
 
         # 4. Переменные
         # Используем get с fallback, чтобы гарантировать уникальность, если ROLE_TO_VAR не настроен
@@ -110,31 +112,27 @@ class SVIODO(Base):
         yv = ROLE_TO_VAR.get('iobj', 'y') 
         zv = ROLE_TO_VAR.get('dobj', 'z')
 
-        # 5. Правила соединения (импликация для ∀, конъюнкция для ∃)
-        subj_rule = QUANTIFIER_RULE.get(subj_quant, "∧")
-        iobj_rule = QUANTIFIER_RULE.get(iobj_quant, "∧")
-        dobj_rule = QUANTIFIER_RULE.get(dobj_quant, "∧")
-
-        # 6. Предикат
+        # 5. Предикат
         pred_name = root.lemma_.capitalize()
         
-        # 7. Сборка формулы (от внутреннего к внешнему)
+        # 6. Сборка формулы (от внутреннего к внешнему)
+        # Связки: импликация для ∀, конъюнкция для ∃
         
         # Атом: ¬Give(x, y, z)
         # Обратите внимание на порядок аргументов: (Agent, Recipient, Theme) -> (x, y, z)
-        atom = f"{neg_symbol}{pred_name}({xv}, {yv}, {zv})"
+        atom = predicate(pred_name, xv, yv, zv, negated=final_neg)
 
         # Уровень 1: Прямое дополнение (Theme)
         # Qz z ( Book(z) rule Atom )
-        dobj_formula = f"{dobj_quant}{zv} ({dobj_noun}({zv}) {dobj_rule} {atom})"
+        dobj_formula = quantified(dobj_quant, zv, dobj_noun, atom)
 
         # Уровень 2: Косвенное дополнение (Recipient)
         # Qy y ( Student(y) rule dobj_formula )
-        iobj_formula = f"{iobj_quant}{yv} ({iobj_noun}({yv}) {iobj_rule} {dobj_formula})"
+        iobj_formula = quantified(iobj_quant, yv, iobj_noun, dobj_formula)
 
         # Уровень 3: Субъект (Agent)
         # Qx x ( Teacher(x) rule iobj_formula )
-        final_formula = f"{subj_quant}{xv} ({subj_noun}({xv}) {subj_rule} {iobj_formula})"
+        final_formula = quantified(subj_quant, xv, subj_noun, iobj_formula)
 
         return final_formula
 
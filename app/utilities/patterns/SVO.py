@@ -1,6 +1,7 @@
 from typing import Optional, Tuple, Any
 from .base import Base
-from .utils import ROLE_TO_VAR, QUANTIFIER_RULE
+from .utils import ROLE_TO_VAR
+from .formula import predicate, quantified
 
 # Предполагается, что doc - это объект spacy.tokens.Doc или Span
 # Для типизации используем Any или импортируем spacy.tokens
@@ -9,9 +10,11 @@ class SVO(Base):
     Обработчик предложений со структурой «Субъект — Глагол — Объект» (SVO).
 
     Этот класс наследуется от Base и реализует логику выявления (match)
-    и преобразования (convert) простых предложений, содержащих подлежащее (nsubj),
+    и преобразования (convert_formula) простых предложений, содержащих подлежащее (nsubj),
     сказуемое (ROOT) и прямое дополнение (dobj), в формулы логики первого порядка.
     """
+
+    required_deps = frozenset({"nsubj", "dobj"})
     
     def match(self, doc: Any) -> bool:
         """
@@ -43,9 +46,9 @@ class SVO(Base):
 
         return subj is not None and obj is not None
 
-    def convert(self, doc: Any) -> str:
+    def convert_formula(self, doc: Any) -> Any:
         """
-        Преобразует документ SVO в строковое представление логической формулы.
+        Строит логическую формулу для документа SVO (дерево объектов Formula).
 
         Алгоритм преобразования:
         1.  **Извлечение компонентов**: Находит подлежащее, сказуемое и дополнение.
@@ -54,7 +57,7 @@ class SVO(Base):
         3.  **Обработка отрицания**: Вычисляется итоговое отрицание предиката
             с использованием операции XOR между отрицаниями субъекта, глагола и объекта.
             Это позволяет корректно обрабатывать двойные и тройные отрицания.
-        4.  **Сборка формулы**: Формирует вложенную строку вида:
+        4.  **Сборка формулы**: Формирует вложенную формулу вида:
             `Q1 x ( Subject(x) RULE1 ( Q2 y ( Object(y) RULE2 Atom ) ) )`,
             где Atom — это предикат действия, например `¬Eat(x, y)`.
 
@@ -62,7 +65,7 @@ class SVO(Base):
             doc: Обрабатываемый документ (spacy.tokens.Doc).
 
         Returns:
-            str: Строка, содержащая итоговую логическую формулу.
+            Formula: Итоговая логическая формула.
         """
         root = self.find_root(doc)
 
@@ -80,7 +83,6 @@ class SVO(Base):
         # 3. Вычисляем итоговое отрицание предиката (XOR трех значений)
         # True, если нечетное количество отрицаний
         final_negation = subj_is_neg ^ verb_is_neg ^ obj_is_neg
-        neg_symbol = "¬" if final_negation else ""
 
         # 4. Собираем переменные и правило
         pred_name = root.lemma_.capitalize()
@@ -88,20 +90,17 @@ class SVO(Base):
         xv = ROLE_TO_VAR['nsubj']
         yv = ROLE_TO_VAR['dobj']
 
-        subj_rule = QUANTIFIER_RULE[subj_quant]
-        obj_rule = QUANTIFIER_RULE[obj_quant]
-
         # 5. Формируем атом действия
         # Например: ¬Eat(x, y)
-        atom = f"{neg_symbol}{pred_name}({xv}, {yv})"
+        atom = predicate(pred_name, xv, yv, negated=final_negation)
 
         # 6. Вложенная формула объекта
         # Q2 y ( Object(y) RULE2 Atom )
-        object_formula = f"{obj_quant}{yv} ({obj_noun}({yv}) {obj_rule} {atom})"
+        object_formula = quantified(obj_quant, yv, obj_noun, atom)
 
         # 7. Финальная формула
         # Q1 x ( Subject(x) RULE1 Object_Formula )
-        return f"{subj_quant}{xv} ({subj_noun}({xv}) {subj_rule} {object_formula})"
+        return quantified(subj_quant, xv, subj_noun, object_formula)
 
     def __str__(self) -> str:
         """
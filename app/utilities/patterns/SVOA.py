@@ -1,6 +1,7 @@
 from typing import Any, Optional
 from .base import Base
-from .utils import ROLE_TO_VAR, QUANTIFIER_RULE
+from .utils import ROLE_TO_VAR
+from .formula import predicate, quantified
 
 
 class SVOA(Base):
@@ -17,7 +18,7 @@ class SVOA(Base):
     2.  Наличие **dobj** (прямого объекта).
     3.  Наличие обстоятельства (**advmod**, **obl**, **prep**, **npadvmod**).
 
-    ### Логическое преобразование (convert):
+    ### Логическое преобразование (convert_formula):
     Формула с тройной вложенностью:
     `Q1x ( Subject(x) RULE1 Q2y ( Object(y) RULE2 Q3z ( Adverb(z) RULE3 Predicate(x, y, z) ) ) )`
     
@@ -28,6 +29,9 @@ class SVOA(Base):
     - Отрицание (¬) вычисляется как XOR(subj, verb, obj, adv).
     """
 
+    required_deps = frozenset({"nsubj", "dobj"})
+    any_of_deps = (frozenset({"advmod", "obl", "npadvmod", "prep"}),)
+
     def match(self, doc: Any) -> bool:
         """
         Проверяет наличие субъекта, объекта и обстоятельства.
@@ -65,9 +69,9 @@ class SVOA(Base):
             return token
         return token
 
-    def convert(self, doc: Any) -> str:
+    def convert_formula(self, doc: Any) -> Any:
         """
-        Преобразует SVOA-предложение в логическую формулу.
+        Строит логическую формулу для SVOA-предложения.
         """
         root = self.find_root(doc)
         
@@ -101,33 +105,27 @@ class SVOA(Base):
 
         # 4. Итоговое отрицание (XOR четырех компонентов)
         final_neg = subj_neg ^ verb_neg ^ obj_neg ^ adv_neg
-        neg_symbol = "¬" if final_neg else ""
 
         # 5. Переменные
         xv = ROLE_TO_VAR.get('nsubj', 'x')
         yv = ROLE_TO_VAR.get('dobj', 'y')
         zv = 'z' # Используем z для третьего аргумента
 
-        # 6. Правила соединения
-        subj_rule = QUANTIFIER_RULE[subj_quant]
-        obj_rule = QUANTIFIER_RULE[obj_quant]
-        adv_rule = QUANTIFIER_RULE[adv_quant]
-
         pred_name = root.lemma_.capitalize()
 
-        # 7. Сборка формулы (изнутри наружу)
+        # 6. Сборка формулы (изнутри наружу)
 
         # Атом: ¬Eat(x, y, z)
-        atom = f"{neg_symbol}{pred_name}({xv}, {yv}, {zv})"
+        atom = predicate(pred_name, xv, yv, zv, negated=final_neg)
 
         # Уровень 3: Обстоятельство (z) -> Атом
-        level3 = f"{adv_quant}{zv} ({adv_noun}({zv}) {adv_rule} {atom})"
+        level3 = quantified(adv_quant, zv, adv_noun, atom)
 
         # Уровень 2: Объект (y) -> Уровень 3
-        level2 = f"{obj_quant}{yv} ({obj_noun}({yv}) {obj_rule} {level3})"
+        level2 = quantified(obj_quant, yv, obj_noun, level3)
 
         # Уровень 1: Субъект (x) -> Уровень 2
-        final_formula = f"{subj_quant}{xv} ({subj_noun}({xv}) {subj_rule} {level2})"
+        final_formula = quantified(subj_quant, xv, subj_noun, level2)
 
         return final_formula
 
@@ -1,6 +1,6 @@
 from typing import Any, Tuple, Optional
 from .base import Base
-from .utils import ROLE_TO_VAR, QUANTIFIER_RULE
+from .formula import predicate, quantified, render
 
 
 class SVOC(Base):
@@ -8,6 +8,9 @@ class SVOC(Base):
     Класс для SVOC с "Эвристикой Детерминанта" для исправления ошибок sm-модели.
     """
 
+    required_deps = frozenset({"nsubj"})
+    any_of_deps = (frozenset({"dobj", "oprd", "xcomp", "ccomp", "acomp"}),)
+
     def _analyze_structure(self, root: Any) -> Tuple[Optional[Any], Optional[Any]]:
         dobj = None
         for child in root.children:
@@ -69,12 +72,18 @@ class SVOC(Base):
         return (obj_t is not None) and (comp_t is not None)
 
     def convert(self, doc: Any) -> str:
+        formula = self.convert_formula(doc)
+        if formula is None:
+            return "Error: SVOC mismatch"
+        return render(formula)
+
+    def convert_formula(self, doc: Any) -> Optional[Any]:
         root = self.find_root(doc)
         obj_token, comp_token = self._analyze_structure(root)
         subj_token = [c for c in root.children if c.dep_ == "nsubj"][0]
 
         if not obj_token or not comp_token:
-            return "Error: SVOC mismatch"
+            return None
 
         # Данные
         subj_noun, subj_quant, subj_neg = self.extract_quantified_noun(subj_token)
@@ -88,21 +97,16 @@ class SVOC(Base):
         # Отрицание
         verb_neg = self.is_negated(root)
         final_neg = subj_neg ^ verb_neg ^ obj_neg ^ comp_neg
-        neg_symbol = "¬" if final_neg else ""
 
         # Переменные
         xv, yv, zv = "x", "y", "z"
         pred_name = root.lemma_.capitalize()
 
         # Сборка
-        subj_rule = QUANTIFIER_RULE[subj_quant]
-        obj_rule = QUANTIFIER_RULE[obj_quant]
-        comp_rule = QUANTIFIER_RULE[comp_quant]
-
-        atom = f"{neg_symbol}{pred_name}({xv}, {yv}, {zv})"
-        level3 = f"{comp_quant}{zv} ({comp_noun}({zv}) {comp_rule} {atom})"
-        level2 = f"{obj_quant}{yv} ({obj_noun}({yv}) {obj_rule} {level3})"
-        final_formula = f"{subj_quant}{xv} ({subj_noun}({xv}) {subj_rule} {level2})"
+        atom = predicate(pred_name, xv, yv, zv, negated=final_neg)
+        level3 = quantified(comp_quant, zv, comp_noun, atom)
+        level2 = quantified(obj_quant, yv, obj_noun, level3)
+        final_formula = quantified(subj_quant, xv, subj_noun, level2)
 
         return final_formula
 
@@ -1,5 +1,7 @@
-from typing import Optional, Tuple, Any
+from typing import Optional, Tuple, Any, FrozenSet
 from .utils import QUANTIFIER_MAP
+from .features import get_features, DET, NEG, NNS
+from .formula import render
 
 class Base:
     """
@@ -10,8 +12,40 @@ class Base:
     
     Все конкретные классы паттернов (SVO, SVC, SV и т.д.) должны наследовать
     данный класс и реализовывать его абстрактные методы.
+
+    Атрибуты `required_deps`, `any_of_deps` и `forbidden_deps` описывают
+    необходимые условия на метки зависимостей детей корня. По ним
+    PatternFactory отбирает кандидатов без вызова `match`.
     """
 
+    # Метки, которые обязательно должны быть среди детей корня
+    required_deps: FrozenSet[str] = frozenset()
+    # Каждое множество должно пересекаться с метками детей корня
+    any_of_deps: Tuple[FrozenSet[str], ...] = ()
+    # Метки, при наличии которых паттерн заведомо не подходит
+    forbidden_deps: FrozenSet[str] = frozenset()
+
+    def accepts_signature(self, signature: FrozenSet[str]) -> bool:
+        """
+        Быстрая проверка необходимых условий паттерна по сигнатуре документа.
+
+        Сигнатура строится PatternFactory один раз на документ и содержит
+        метки зависимостей детей корня (например, 'nsubj', 'dobj', 'prep:to').
+        Положительный ответ не гарантирует соответствия — окончательное
+        решение принимает `match`.
+
+        Args:
+            signature: Множество меток зависимостей детей корня.
+
+        Returns:
+            bool: False, если паттерн заведомо не подходит, иначе True.
+        """
+        if not self.required_deps <= signature:
+            return False
+        if self.forbidden_deps & signature:
+            return False
+        return all(deps & signature for deps in self.any_of_deps)
+
     def match(self, doc: Any) -> bool:
         """
         Определяет, соответствует ли предложение данному синтаксическому паттерну.
@@ -29,28 +63,46 @@ class Base:
         """
         raise NotImplementedError
 
-    def convert(self, doc: Any) -> str:
+    def convert_formula(self, doc: Any) -> Optional[Any]:
         """
-        Преобразует предложение в строку формата First-Order Logic (FOL).
+        Строит формулу First-Order Logic (FOL) в виде дерева объектов.
 
         Это абстрактный метод, который должен быть переопределен в дочерних классах.
+        Результат можно передать решателю (`run_resolution`) без разбора строки.
 
         Args:
             doc: Обработанный документ или спан (обычно spacy.tokens.Doc).
 
         Returns:
-            str: Строка с формулой FOL.
+            Optional[Formula]: Формула (utilities.Resolution.Formula) или None,
+            если структуру не удалось разобрать.
 
         Raises:
             NotImplementedError: Если метод не переопределен в дочернем классе.
         """
         raise NotImplementedError
 
+    def convert(self, doc: Any) -> str:
+        """
+        Преобразует предложение в строку формата First-Order Logic (FOL).
+
+        Строит дерево через `convert_formula` и отображает его в строку.
+
+        Args:
+            doc: Обработанный документ или спан (обычно spacy.tokens.Doc).
+
+        Returns:
+            str: Строка с формулой FOL (пустая, если формулу построить не удалось).
+        """
+        return render(self.convert_formula(doc))
+
     def find_root(self, doc: Any) -> Optional[Any]:
         """
         Находит корневой токен (ROOT) в синтаксическом дереве документа.
 
         Корень обычно является основным глаголом предложения.
+        Поиск выполняется по массиву меток зависимостей (doc.to_array),
+        без обращения к строковому атрибуту `dep_` каждого токена.
 
         Args:
             doc: Обработанный документ или спан (обычно spacy.tokens.Doc).
@@ -58,10 +110,12 @@ class Base:
         Returns:
             Optional[Any]: Корневой токен (spacy.tokens.Token) или None, если не найден.
         """
-        for token in doc:
-            if token.dep_ == 'ROOT':
-                return token
-        return None
+        features = get_features(doc)
+        start = getattr(doc, "start", 0)
+        index = features.find_root(start, start + len(doc))
+        if index is None:
+            return None
+        return doc.doc[index]
 
     def is_negated(self, token: Any) -> bool:
         """
@@ -76,10 +130,7 @@ class Base:
         Returns:
             bool: True, если найдено отрицание, иначе False.
         """
-        for child in token.children:
-            if child.dep_ == "neg":
-                return True
-        return False
+        return get_features(token).has_child_dep(token.i, NEG)
 
     def extract_quantified_noun(self, token: Any) -> Tuple[str, str, bool]:
         """
@@ -103,22 +154,23 @@ class Base:
                 - **quantifier (str)**: Символ квантора ('∀' или '∃').
                 - **is_quant_neg (bool)**: Флаг отрицательного квантора (True для 'no'/'none').
         """
-        noun = token.lemma_.capitalize()
+        features = get_features(token)
+        dep, lemma = features.dep_ids, features.lemma_ids
+        noun = features.lemma_text(lemma[token.i]).capitalize()
         quantifier = None
         is_quant_neg = False
 
         # 1. Ищем явный квантор (det)
-        for child in token.children:
-            # print(child, child.dep_)
-            if child.dep_ == "det":
-                lemma = child.lemma_.lower()
-                if lemma in QUANTIFIER_MAP:
-                    quantifier = QUANTIFIER_MAP[lemma]
+        for child in features.children[token.i]:
+            if dep[child] == DET:
+                child_lemma = features.lemma_text(lemma[child]).lower()
+                if child_lemma in QUANTIFIER_MAP:
+                    quantifier = QUANTIFIER_MAP[child_lemma]
                     # Если квантор 'no' или 'none', это логическое отрицание
-                    if lemma in ['no', 'none', 'not']:
+                    if child_lemma in ['no', 'none', 'not']:
                         is_quant_neg = True
                     break
-            elif child.dep_ == "neg":
+            elif dep[child] == NEG:
                 is_quant_neg = True
         
         # 2. Если квантор не найден, применяем эвристику (Implicit Quantifiers)
@@ -127,7 +179,7 @@ class Base:
             # NN = Noun, singular (Единственное число) -> Обычно "Существует" (Student reads -> A student reads)
             # NNP = Proper noun (Имя собственное) -> Пока трактуем как ∃ (John sleeps -> Exists x (John(x) AND Sleep(x)))
             
-            if token.tag_ == "NNS":
+            if features.tag_ids[token.i] == NNS:
                 quantifier = '∀'
             else:
                 quantifier = '∃'
@@ -0,0 +1,117 @@
+'''
+Признаки токенов документа в виде массивов NumPy (doc.to_array).
+
+Вместо обращения к строковым атрибутам токенов (`dep_`, `lemma_`, `tag_`),
+каждое из которых пересекает границу Cython и создаёт строку, паттерны
+сравнивают целочисленные идентификаторы меток из StringStore.
+'''
+from typing import Any, Dict, List, Optional, Tuple
+import weakref
+
+import numpy as np
+from spacy.attrs import DEP, HEAD, LEMMA, TAG, POS
+from spacy.glossary import GLOSSARY
+from spacy.strings import get_string_id
+
+ATTRS = [DEP, HEAD, LEMMA, TAG, POS]
+
+# Идентификаторы часто используемых меток (хеши строк не зависят от словаря)
+ROOT = get_string_id("ROOT")
+NEG = get_string_id("neg")
+DET = get_string_id("det")
+PREP = get_string_id("prep")
+NNS = get_string_id("NNS")
+
+# Расшифровка идентификаторов меток DEP/POS/TAG в строки. Набор меток
+# фиксирован (глоссарий spaCy), поэтому словарь заполняется один раз и не растёт
+_LABELS: Dict[int, str] = {get_string_id(label): label for label in GLOSSARY}
+
+
+def label_id(label: str) -> int:
+    """Возвращает целочисленный идентификатор метки (хеш строки spaCy)."""
+    return get_string_id(label)
+
+
+class DocFeatures:
+    """
+    Массивы признаков всех токенов документа.
+
+    Строится один раз на документ. Индексы токенов — абсолютные индексы в Doc,
+    поэтому один объект обслуживает и документ, и любые его спаны (предложения).
+
+    Attributes:
+        dep, lemma, tag, pos: Идентификаторы меток (np.ndarray[uint64]).
+        head: Абсолютный индекс вершины каждого токена (np.ndarray[int64]).
+        dep_ids, lemma_ids, tag_ids: Те же идентификаторы списками Python —
+            для поэлементного доступа без создания скаляров NumPy.
+        children: Списки индексов детей для каждого токена.
+    """
+
+    def __init__(self, doc: Any):
+        doc = doc.doc
+        self.strings = doc.vocab.strings
+        array = doc.to_array(ATTRS)
+        self.dep = array[:, 0]
+        # HEAD хранится как относительное смещение в беззнаковом виде
+        self.head = np.arange(len(doc), dtype=np.int64) + array[:, 1].astype(np.int64)
+        self.lemma = array[:, 2]
+        self.tag = array[:, 3]
+        self.pos = array[:, 4]
+        self.dep_ids: List[int] = self.dep.tolist()
+        self.lemma_ids: List[int] = self.lemma.tolist()
+        self.tag_ids: List[int] = self.tag.tolist()
+
+        self.children: List[List[int]] = [[] for _ in range(len(doc))]
+        for i, head in enumerate(self.head.tolist()):
+            if head != i:
+                self.children[head].append(i)
+
+    def text(self, value: int) -> str:
+        """Расшифровывает идентификатор метки зависимости или тега в строку."""
+        text = _LABELS.get(value)
+        if text is None:
+            # метка не из глоссария (своя модель): берём из словаря, не кешируя
+            text = self.strings[value]
+        return text
+
+    def lemma_text(self, value: int) -> str:
+        """Расшифровывает идентификатор леммы в строку (из словаря документа)."""
+        return self.strings[value]
+
+    def find_root(self, start: int, end: int) -> Optional[int]:
+        """Индекс первого токена с меткой ROOT в диапазоне [start, end) или None."""
+        found = np.flatnonzero(self.dep[start:end] == ROOT)
+        if found.size == 0:
+            return None
+        return start + int(found[0])
+
+    def child_deps(self, i: int) -> List[int]:
+        """Идентификаторы меток зависимостей детей токена (в порядке следования)."""
+        dep = self.dep_ids
+        return [dep[c] for c in self.children[i]]
+
+    def has_child_dep(self, i: int, dep_id: int) -> bool:
+        """Проверяет, есть ли у токена ребёнок с заданной меткой зависимости."""
+        dep = self.dep_ids
+        return any(dep[c] == dep_id for c in self.children[i])
+
+
+# (weakref на документ, признаки) — одна пара, чтобы замена была атомарной
+_last: Optional[Tuple[weakref.ref, DocFeatures]] = None
+
+
+def get_features(doc: Any) -> DocFeatures:
+    """
+    Возвращает массивы признаков для документа (Doc, Span или Token).
+
+    Признаки последнего документа кешируются: фабрика паттернов, `match`
+    и `convert` обрабатывают один и тот же документ подряд.
+    """
+    global _last
+    doc = doc.doc
+    last = _last
+    if last is not None and last[0]() is doc:
+        return last[1]
+    features = DocFeatures(doc)
+    _last = (weakref.ref(doc), features)
+    return features
@@ -0,0 +1,87 @@
+'''
+Построение формул FOL в виде дерева (классы Formula из utilities.Resolution).
+
+Паттерны собирают формулу из объектов, а строка строится только для показа
+(функция `render`). Решатель принимает эти объекты напрямую, без повторного
+разбора строки парсером.
+'''
+from typing import Optional
+from utilities.Resolution import Formula, Atom, Not, And, Or, Implies, Iff, ForAll, Exists, Term
+from .utils import QUANTIFIER_RULE
+
+# Символы связок для отображения
+CONNECTIVES = {
+    And: "∧",
+    Or: "∨",
+    Implies: "→",
+    Iff: "↔",
+}
+
+
+def predicate(name: str, *variables: str, negated: bool = False) -> Formula:
+    """
+    Строит атом `Name(v1, v2, ...)`, при необходимости с отрицанием.
+
+    Args:
+        name (str): Имя предиката (обычно лемма с заглавной буквы).
+        *variables (str): Имена переменных-аргументов.
+        negated (bool): Добавить ли отрицание (¬).
+
+    Returns:
+        Formula: Atom или Not(Atom).
+    """
+    atom = Atom(name, tuple(Term(v) for v in variables))
+    return Not(atom) if negated else atom
+
+
+def quantified(quantifier: str, var: str, noun: str, body: Formula) -> Formula:
+    """
+    Строит формулу вида `Qv (Noun(v) RULE body)`.
+
+    Связка выбирается по QUANTIFIER_RULE: для ∀ — импликация, для ∃ — конъюнкция.
+
+    Args:
+        quantifier (str): Символ квантора ('∀' или '∃').
+        var (str): Связываемая переменная.
+        noun (str): Предикат-ограничитель (существительное).
+        body (Formula): Вложенная формула.
+
+    Returns:
+        Formula: ForAll или Exists.
+    """
+    restriction = predicate(noun, var)
+    if QUANTIFIER_RULE.get(quantifier, "∧") == "→":
+        inner = Implies(restriction, body)
+    else:
+        inner = And(restriction, body)
+
+    if quantifier == "∀":
+        return ForAll(var, inner)
+    return Exists(var, inner)
+
+
+def render(formula: Optional[Formula], nested: bool = False) -> str:
+    """
+    Преобразует дерево формулы в строку в формате паттернов.
+
+    Пример: `∀x (Student(x) → ∃y (Book(y) ∧ ¬Read(x, y)))`.
+
+    Args:
+        formula: Формула (или None — тогда пустая строка).
+        nested (bool): Брать ли бинарную связку в скобки (внутри других связок).
+
+    Returns:
+        str: Строковое представление формулы.
+    """
+    if formula is None:
+        return ""
+    if isinstance(formula, Atom):
+        return str(formula)
+    if isinstance(formula, Not):
+        return f"¬{render(formula.f, nested=True)}"
+    if isinstance(formula, (ForAll, Exists)):
+        symbol = "∀" if isinstance(formula, ForAll) else "∃"
+        return f"{symbol}{formula.var} ({render(formula.body)})"
+
+    text = f"{render(formula.left, nested=True)} {CONNECTIVES[type(formula)]} {render(formula.right, nested=True)}"
+    return f"({text})" if nested else text
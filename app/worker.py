@@ -0,0 +1,53 @@
+'''
+Воркеры фоновой очереди заданий (резолюция, ансамбль LLM).
+
+Запускает несколько локальных процессов; каждый поднимает приложение
+(модели spaCy, клиенты LLM) и выполняет задания из таблицы Job.
+
+Пример:
+    python worker.py --processes 4
+'''
+import argparse
+import multiprocessing
+import signal
+
+
+def run_worker(poll: float):
+    from app import app
+    from blueprints.main import warm_up
+    from utilities.JobQueue import work
+
+    # Модели загружаются до первого задания, чтобы оно не ждало их
+    warm_up(translation=False)
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    try:
+        work(app, stop=lambda: bool(stopping), poll=poll)
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Воркеры фоновой очереди заданий.")
+    parser.add_argument("--processes", type=int, default=2, help="Число процессов-воркеров")
+    parser.add_argument("--poll", type=float, default=0.5, help="Пауза при пустой очереди, с")
+    args = parser.parse_args(argv)
+
+    # spawn: каждый воркер создаёт свои соединения с базой и клиенты LLM
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run_worker, args=(args.poll,), name=f"worker-{i}") for i in range(args.processes)]
+    for process in workers:
+        process.start()
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()